@@ -5,40 +5,53 @@ Importação de Relatório de Faturamento de Eventos
 """
 
 import os
-import json
 import io
 from datetime import datetime, date
-from flask import Flask, render_template, request, jsonify, send_file, flash, redirect, url_for
+from flask import Flask, Response, g, stream_with_context, session, render_template, request, jsonify, send_file, flash, redirect, url_for
+from werkzeug.local import LocalProxy
 from werkzeug.utils import secure_filename
-import pandas as pd
 import re
+import threading
+import time
+import uuid
 
-# Plotly para gráficos
-try:
-    import plotly.express as px
-    import plotly.graph_objects as go
-    import plotly.utils
-    PLOTLY_AVAILABLE = True
-    print("✅ Plotly carregado com sucesso")
-except ImportError as e:
-    print(f"⚠️ Plotly não disponível: {e}")
-    PLOTLY_AVAILABLE = False
-
-# ReportLab para PDF
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-
-# PostgreSQL
-from database import PostgreSQLManager
+# Dependências pesadas (pandas, reportlab) são importadas no primeiro
+# uso, dentro das funções, para não pesar no boot dos workers
+
+# Logging configurado antes dos demais módulos (alguns registram mensagens ao serem importados)
+from logging_config import setup_logging, get_logger
+setup_logging()
+logger = get_logger('app')
+
+# Cadastros (PostgreSQL ou SQLite)
+from database import circos_cidades_to_json, create_storage, run_migrations, validate_periodo
+from report_cache import ReportCache, make_report_key, new_data_version
+from columnar import PYARROW_AVAILABLE, COLUMNAR_EXTENSIONS
+from session_store import DatasetStore, SESSION_KEY, is_valid_dataset_id, load_secret_key, new_dataset_id
+from web_utils import init_json, init_compression
+from pdf_export import pdf_cache
+from pagination import DEFAULT_PAGE_SIZE, DATE_COLUMN, FONTES, parse_page_args
+from profiling import artifact_path, init_profiling, is_admin, list_artifacts
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, cache_collector, init_metrics, observe_stage, register_collector, render_metrics, reset_metrics_dir, timed
 
 app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY', '6a5bb56c77797ae84352a9043ab0b7e04a8a86530cbc74f388b63607d99741fb')
+# Sem SECRET_KEY no ambiente: chave aleatória gerada uma vez por container (nunca uma chave fixa no código)
+app.secret_key = load_secret_key()
+
+# JSON rápido (orjson) e compressão gzip/brotli das respostas grandes
+init_json(app)
+init_compression(app)
+
+# Latência por rota para o /metrics
+init_metrics(app)
+
+# Profiling sob demanda (X-Profile + X-Admin-Token) e amostragem das requisições lentas
+init_profiling(app)
 
 # Configurações
 ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
+if PYARROW_AVAILABLE:
+    ALLOWED_EXTENSIONS |= COLUMNAR_EXTENSIONS
 UPLOAD_FOLDER = 'uploads'
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
 
@@ -52,8 +65,119 @@ class SocratesProcessor:
     """Classe para processar dados do Sócrates Online"""
     
     def __init__(self):
+        self._snapshot = None
+        self.snapshot_version = None
         self.processed_data = []
-        self.original_df = None
+        # Versão dos dados e DataFrame tipado publicados juntos, numa só tupla (ver events_frame)
+        self._frame = (new_data_version(), None)
+        self._frame_lock = threading.Lock()
+        self.last_report_key = None
+        self.last_report_data = None
+        self.last_report_filters = None
+        # Estruturas derivadas, marcadas com a versão a partir da qual foram montadas
+        self._events = None
+        self._circo_prefix = None
+        self._cities = None
+        self._city_prefix = None
+        self._cube = None
+        self._row_orders = {}
+    
+    @property
+    def processed_data(self):
+        """Registros processados; vindos de um snapshot, são materializados só quando pedidos"""
+        if self._records is None:
+            from snapshots import snapshot_records
+            self._records = snapshot_records(self._snapshot)
+        return self._records
+    
+    @processed_data.setter
+    def processed_data(self, records):
+        self._records = records
+        self._snapshot = None
+    
+    @property
+    def data_version(self):
+        """Versão do dataset atual: muda a cada importação ou snapshot mapeado"""
+        return self._frame[0]
+    
+    def _publish(self, records):
+        """Troca o dataset por inteiro: primeiro os registros, depois a versão que invalida os derivados"""
+        self.processed_data = records
+        with self._frame_lock:
+            self._frame = (new_data_version(), None)
+        self._forget_last_report()
+        
+        # DataFrame tipado montado uma vez, na importação
+        self.events_frame()
+    
+    def _forget_last_report(self):
+        """Descartar o último relatório (exportações) ao trocar de dataset"""
+        self.last_report_key = None
+        self.last_report_data = None
+        self.last_report_filters = None
+    
+    def has_data(self):
+        """Há dados importados (em memória ou no snapshot mapeado)?"""
+        if self._records is None:
+            return self._snapshot.num_rows > 0
+        return bool(self._records)
+    
+    def record_count(self):
+        """Quantidade de registros importados (sem materializar o snapshot)"""
+        if self._records is None:
+            return self._snapshot.num_rows
+        return len(self._records)
+    
+    def publish_snapshot(self, dataset_id):
+        """Grava o dataset atual como snapshot compartilhado pelos demais workers"""
+        from snapshots import write_snapshot
+        try:
+            self.snapshot_version = write_snapshot(dataset_id, self.processed_data)
+            return True
+        except Exception as e:
+            logger.warning("⚠️ Erro ao gravar snapshot: %s", e)
+            return False
+    
+    def sync_snapshot(self, dataset_id):
+        """Carregar o snapshot mais recente do dataset se outro worker publicou uma versão nova"""
+        from snapshots import current_version, open_snapshot, snapshot_events_frame
+        
+        version = current_version(dataset_id)
+        if version is None or version == self.snapshot_version:
+            return False
+        
+        try:
+            table = open_snapshot(dataset_id, version)
+            frame = snapshot_events_frame(table)
+            
+            # Dados trocados antes da versão; versão e DataFrame numa só atribuição:
+            # leitores concorrentes veem o dataset antigo ou o novo, nunca a versão nova sem o DataFrame
+            self._snapshot = table
+            self._records = None
+            with self._frame_lock:
+                self._frame = (new_data_version(), frame)
+            self.snapshot_version = version
+            # Último relatório era do dataset anterior: exportações não podem servir essas linhas
+            self._forget_last_report()
+            
+            logger.info("📸 Snapshot %s mapeado: %d registros", version, table.num_rows)
+            return True
+        except Exception as e:
+            logger.warning("⚠️ Erro ao abrir snapshot %s: %s", version, e)
+            return False
+    
+    def memory_usage(self):
+        """Estimativa dos bytes ocupados pelo dataset (registros e DataFrame)"""
+        from report_cache import estimate_size
+        
+        size = 0
+        if self._records:
+            sample = self._records[:100]
+            size += estimate_size(sample) * len(self._records) // len(sample)
+        frame = self._frame[1]
+        if frame is not None:
+            size += int(frame.memory_usage(deep=True).sum())
+        return size
     
     def allowed_file(self, filename):
         """Verifica se o arquivo é permitido"""
@@ -61,6 +185,7 @@ class SocratesProcessor:
     
     def extract_circo_name(self, evento_text):
         """Extrai o nome do circo do texto do evento"""
+        import pandas as pd
         
         # Verificar se é NAN ou inválido
         if pd.isna(evento_text) or str(evento_text).lower() in ['nan', 'none', '']:
@@ -104,6 +229,7 @@ class SocratesProcessor:
 
     def format_currency(self, value):
         """Formata valores monetários"""
+        import pandas as pd
         try:
             if pd.isna(value):
                 return 0
@@ -124,12 +250,50 @@ class SocratesProcessor:
         except:
             return "R$ 0,00"
 
+    def process_file(self, file_path):
+        """Processa arquivo importado: Excel ou colunar (Parquet/Arrow)"""
+        from columnar import is_columnar, read_columnar, is_processed_frame
+        
+        if not is_columnar(file_path):
+            return self.process_excel_file(file_path)
+        
+        try:
+            with timed('importacao_leitura'):
+                df = read_columnar(file_path)
+        except Exception as e:
+            return False, f"Erro ao processar arquivo: {str(e)}"
+        
+        # Eventos já processados (exportados pelo próprio app ou pelo warehouse): sem reprocessar linha a linha
+        if is_processed_frame(df):
+            return self.load_processed_frame(df)
+        return self.process_dataframe(df)
+    
+    def load_processed_frame(self, df):
+        """Carrega eventos já processados de um arquivo colunar"""
+        from columnar import processed_records
+        try:
+            records = processed_records(df)
+            self._publish(records)
+            
+            return True, f"{len(records)} registros processados com sucesso"
+            
+        except Exception as e:
+            return False, f"Erro ao processar arquivo: {str(e)}"
+    
     def process_excel_file(self, file_path):
         """Processa arquivo Excel e retorna dados processados"""
+        import pandas as pd
+        try:
+            with timed('importacao_leitura'):
+                df = pd.read_excel(file_path)
+        except Exception as e:
+            return False, f"Erro ao processar arquivo: {str(e)}"
+        return self.process_dataframe(df)
+    
+    def process_dataframe(self, df):
+        """Processa a planilha de eventos (colunas do Sócrates) e retorna dados processados"""
+        import pandas as pd
         try:
-            df = pd.read_excel(file_path)
-            self.original_df = df.copy()
-            
             # Verificar colunas necessárias
             required_columns = ['Evento', 'Data Evento', 'Faturamento Total', 'Faturamento Gestão Produtor']
             missing_columns = [col for col in required_columns if col not in df.columns]
@@ -137,15 +301,22 @@ class SocratesProcessor:
             if missing_columns:
                 return False, f"Colunas não encontradas: {', '.join(missing_columns)}"
             
-            self.processed_data = []
+            # Lista nova, publicada só no fim: leitores concorrentes nunca veem a importação pela metade
+            records = []
+            
+            # Tempo acumulado por etapa ao longo das linhas (uma observação por arquivo)
+            tempos = {'extracao': 0.0, 'datas': 0.0, 'moeda': 0.0}
             
             for index, row in df.iterrows():
                 try:
                     if pd.isna(row['Evento']):
                         continue
                     
+                    inicio = time.perf_counter()
                     evento = str(row['Evento'])
                     circo = self.extract_circo_name(evento)
+                    extraido = time.perf_counter()
+                    tempos['extracao'] += extraido - inicio
                     
                     if circo in ['Evento Inválido', 'Evento Sem Nome']:
                         continue
@@ -177,9 +348,12 @@ class SocratesProcessor:
                             else:
                                 data_evento = data_evento.strftime('%d/%m/%Y')
                         except Exception as e:
-                            print(f"⚠️ Erro ao processar data '{data_evento}': {e}")
+                            logger.warning("⚠️ Erro ao processar data '%s': %s", data_evento, e)
                             data_evento = str(data_evento)
                     
+                    datado = time.perf_counter()
+                    tempos['datas'] += datado - extraido
+                    
                     # Processar valores
                     faturamento_total = self.format_currency(row['Faturamento Total'])
                     faturamento_gestao = self.format_currency(row['Faturamento Gestão Produtor'])
@@ -197,10 +371,12 @@ class SocratesProcessor:
                         if col in row and not pd.isna(row[col]):
                             taxas_e_descontos += self.format_currency(row[col])
                     
+                    tempos['moeda'] += time.perf_counter() - datado
+                    
                     # Calcular valor líquido
                     valor_liquido = faturamento_total - faturamento_gestao - taxas_e_descontos
                     
-                    self.processed_data.append({
+                    records.append({
                         'Circo': circo,
                         'Data Evento': data_evento,
                         'Evento Completo': evento,
@@ -213,205 +389,268 @@ class SocratesProcessor:
                 except Exception as e:
                     continue
             
-            return True, f"{len(self.processed_data)} registros processados com sucesso"
+            for etapa, segundos in tempos.items():
+                observe_stage(f'importacao_{etapa}', segundos)
+            
+            self._publish(records)
+            
+            return True, f"{len(records)} registros processados com sucesso"
             
         except Exception as e:
             return False, f"Erro ao processar arquivo: {str(e)}"
 
-    def filter_and_generate_report(self, selected_circos, data_inicio, data_fim):
-        """Filtra dados e gera relatório por circos"""
-        df = pd.DataFrame(self.processed_data)
-        
-        if df.empty:
-            return []
-        
-        # Filtrar por circos selecionados
-        df = df[df['Circo'].isin(selected_circos)]
-        
-        # Filtrar por período
-        try:
-            df['Data Evento'] = pd.to_datetime(df['Data Evento'], format='%d/%m/%Y', errors='coerce')
-            df = df.dropna(subset=['Data Evento'])
-            df = df[
-                (df['Data Evento'].dt.date >= data_inicio) & 
-                (df['Data Evento'].dt.date <= data_fim)
-            ]
-        except Exception as e:
-            print(f"⚠️ Erro no filtro de datas: {e}")
-            pass
-        
-        if df.empty:
-            return []
+    def _cached_report(self, tipo_filtro, selection, data_inicio, data_fim, generate):
+        """Relatório do cache LRU ou gerado e armazenado"""
+        filters = (tipo_filtro, list(selection), data_inicio, data_fim)
+        
+        if tipo_filtro == 'cidade':
+            cadastros_version = circos_manager.get_version()
+            if cadastros_version is None:
+                # Sem versão confiável dos cadastros: não usar cache
+                self.last_report_key = None
+                report_data = generate(selection, data_inicio, data_fim, cadastros_version)
+                if report_data:
+                    self.last_report_data = report_data
+                    self.last_report_filters = filters
+                return report_data
+        else:
+            cadastros_version = None
         
-        # Agrupar por circo
-        grouped = df.groupby('Circo').agg({
-            'Faturamento Total': 'sum',
-            'Faturamento Gestão Produtor': 'sum',
-            'Taxas e Descontos': 'sum',
-            'Valor Líquido': 'sum'
-        }).reset_index()
-        
-        # Criar dados do relatório
-        report_data = []
-        periodo_str = f"{data_inicio.strftime('%d/%m/%Y')} - {data_fim.strftime('%d/%m/%Y')}"
-        
-        for _, row in grouped.iterrows():
-            report_data.append({
-                'Circo': row['Circo'],
-                'Período': periodo_str,
-                'Faturamento Total': row['Faturamento Total'],
-                'Faturamento Gestão Produtor': row['Faturamento Gestão Produtor'],
-                'Taxas e Descontos': row['Taxas e Descontos'],
-                'Valor Líquido': row['Valor Líquido'],
-                'Total Geral': row['Faturamento Total']
-            })
+        key = make_report_key(self.data_version, cadastros_version, tipo_filtro, selection, data_inicio, data_fim)
+        self.last_report_key = key
+        report_data = report_cache.get(key)
+        if report_data is None:
+            report_data = generate(selection, data_inicio, data_fim, cadastros_version)
+            report_cache.put(key, report_data)
         
-        self.last_report_data = report_data
+        if report_data:
+            self.last_report_data = report_data
+            self.last_report_filters = filters
         return report_data
     
+    def report_charts(self, tipo_filtro, report_data):
+        """Gráficos do último relatório, cacheados junto com ele"""
+        from charts import build_charts
+        
+        if self.last_report_key is None:
+            return build_charts(report_data, tipo_filtro)
+        
+        key = ('charts',) + self.last_report_key
+        charts = report_cache.get(key)
+        if charts is None:
+            charts = build_charts(report_data, tipo_filtro)
+            report_cache.put(key, charts)
+        return charts
+    
+    def filter_and_generate_report(self, selected_circos, data_inicio, data_fim):
+        """Relatório por circos (com cache)"""
+        return self._cached_report('circo', selected_circos, data_inicio, data_fim, self._generate_report)
+    
     def filter_and_generate_report_by_cities(self, selected_cidades, data_inicio, data_fim):
-        """Filtrar dados e gerar relatório agrupado por cidades"""
-        if not self.processed_data:
-            return []
-        
-        df = pd.DataFrame(self.processed_data)
+        """Relatório por cidades (com cache)"""
+        return self._cached_report('cidade', selected_cidades, data_inicio, data_fim, self._generate_report_by_cities)
+    
+    def events_frame(self):
+        """DataFrame tipado dos eventos (datas no índice, circo/cidade categóricos)"""
+        from report_index import build_events_frame
+        
+        # Versão e DataFrame lidos juntos: uma troca de dataset no meio não mistura os dois
+        version, frame = self._frame
+        if frame is None:
+            frame = build_events_frame(self.processed_data)
+            with self._frame_lock:
+                # Só publica se o dataset não foi trocado durante a montagem
+                if self._frame[0] == version:
+                    self._frame = (version, frame)
+        return frame
+    
+    def events_between(self, data_inicio, data_fim, circos=None, cidades=None):
+        """Eventos do período por fatiamento do índice de datas (inclusive)"""
+        if cidades:
+            # Garante a coluna 'Cidade' da versão atual dos cadastros
+            self._event_cities(circos_manager.get_version())
+        
+        frame = self.events_frame().loc[data_inicio.isoformat():data_fim.isoformat()]
+        if circos:
+            frame = frame[frame['Circo'].isin(circos)]
+        if cidades:
+            frame = frame[frame['Cidade'].isin(cidades)]
+        return frame
+    
+    def associated_events(self):
+        """Todos os eventos processados, com a cidade associada"""
+        self._event_cities(circos_manager.get_version())
+        return self.events_frame()
+    
+    def report_events(self):
+        """Eventos do período do último relatório (fatia sem cópia, já com a cidade) e o filtro (coluna, valores)
+        
+        O filtro por circo/cidade fica para as exportações aplicarem bloco a bloco:
+        filtrar aqui copiaria todas as linhas selecionadas de uma vez.
+        """
+        tipo_filtro, selection, data_inicio, data_fim = self.last_report_filters
+        self._event_cities(circos_manager.get_version())
+        events = self.events_frame().loc[data_inicio.isoformat():data_fim.isoformat()]
+        if not selection:
+            return events, None
+        return events, ('Cidade' if tipo_filtro == 'cidade' else 'Circo', selection)
+    
+    def _event_arrays(self):
+        """Arrays (circos, datas, valores) extraídos do DataFrame, uma vez por versão"""
+        from report_index import frame_to_arrays
         
-        # Filtrar por período
-        try:
-            df['Data Evento Parsed'] = pd.to_datetime(df['Data Evento'], format='%d/%m/%Y')
-            df = df[
-                (df['Data Evento Parsed'].dt.date >= data_inicio) &
-                (df['Data Evento Parsed'].dt.date <= data_fim)
-            ]
-        except:
-            pass
+        if self._events is None or self._events[0] != self.data_version:
+            self._events = (self.data_version, frame_to_arrays(self.events_frame()))
+        return self._events[1]
+    
+    def _circo_index(self):
+        """Somas acumuladas por circo"""
+        from report_index import PrefixSumIndex
+        
+        if self._circo_prefix is None or self._circo_prefix[0] != self.data_version:
+            circos, dates, amounts = self._event_arrays()
+            self._circo_prefix = (self.data_version, PrefixSumIndex(circos, dates, amounts))
+        return self._circo_prefix[1]
+    
+    def _event_cities(self, cadastros_version):
+        """Cidade de cada evento (depende também da versão dos cadastros)"""
+        import pandas as pd
+        from report_index import ScheduleIndex
+        
+        version = (self.data_version, cadastros_version)
+        if self._cities is None or self._cities[0] != version or cadastros_version is None:
+            circos, dates, _ = self._event_arrays()
+            
+            with timed('associacao'):
+                # Associação com cidades: só os cadastros que cobrem o período dos dados
+                schedules = []
+                if len(dates):
+                    schedules = circos_manager.get_by_periodo(
+                        date.fromordinal(int(dates.min())), date.fromordinal(int(dates.max())),
+                        circos=sorted(set(circos))
+                    )
+                cidades = ScheduleIndex(schedules).associate(circos, dates)
+            self.events_frame()['Cidade'] = pd.Categorical(cidades)
+            self._cities = (version, cidades)
+        return self._cities[1]
+    
+    def _city_index(self, cadastros_version):
+        """Somas acumuladas por cidade"""
+        from report_index import PrefixSumIndex
+        
+        version = (self.data_version, cadastros_version)
+        if self._city_prefix is None or self._city_prefix[0] != version or cadastros_version is None:
+            _, dates, amounts = self._event_arrays()
+            cidades = self._event_cities(cadastros_version)
+            self._city_prefix = (version, PrefixSumIndex(cidades, dates, amounts))
+        return self._city_prefix[1]
+    
+    def report_cube(self, cadastros_version):
+        """Cubo (circo × cidade × mês), montado uma vez por versão dos dados e cadastros"""
+        from report_cube import ReportCube
+        
+        version = (self.data_version, cadastros_version)
+        if self._cube is None or self._cube[0] != version or cadastros_version is None:
+            # Garante a coluna 'Cidade' da versão atual dos cadastros no DataFrame
+            self._event_cities(cadastros_version)
+            self._cube = (version, ReportCube(self.events_frame()))
+        return self._cube[1]
+    
+    def _row_order(self, frame, sort, cadastros_version):
+        """Ordem das linhas pela coluna, calculada uma vez por versão dos dados (e dos cadastros, para 'Cidade')"""
+        from pagination import sort_order
+        
+        version = (self.data_version, cadastros_version if sort == 'Cidade' else None)
+        cached = self._row_orders.get(sort)
+        if cached is None or cached[0] != version or (sort == 'Cidade' and cadastros_version is None):
+            cached = (version, sort_order(frame, sort))
+            
+            # Dicionário novo trocado por inteiro (leitores concorrentes nunca veem a troca pela metade)
+            row_orders = dict(self._row_orders)
+            row_orders[sort] = cached
+            self._row_orders = row_orders
+        return cached[1]
+    
+    def rows_page(self, page, page_size, sort, descending=False, with_cities=False):
+        """Página ordenada dos eventos, formatada para exibição, e metadados da paginação"""
+        from pagination import DATE_COLUMN, page_bounds, display_rows
+        
+        cadastros_version = None
+        if with_cities:
+            cadastros_version = circos_manager.get_version()
+            self._event_cities(cadastros_version)
+        elif sort == 'Cidade':
+            # Sem associação não há cidade para ordenar
+            sort = DATE_COLUMN
+        
+        frame = self.events_frame()
+        order = self._row_order(frame, sort, cadastros_version)
+        page, pages, start, stop = page_bounds(len(frame), page, page_size)
+        positions = order[::-1][start:stop] if descending else order[start:stop]
+        
+        rows = display_rows(frame.iloc[positions], self.format_currency_display, with_cities)
+        return rows, {
+            'page': page,
+            'page_size': page_size,
+            'pages': pages,
+            'total': len(frame),
+            'sem_data': self.record_count() - len(frame),
+            'sort': sort,
+            'order': 'desc' if descending else 'asc'
+        }
+    
+    def _generate_report(self, selected_circos, data_inicio, data_fim, cadastros_version=None):
+        """Gera relatório por circos a partir das somas acumuladas"""
+        from report_index import build_report_rows
         
-        if df.empty:
+        if not self.has_data():
             return []
         
-        # Fazer associação com cidades
-        circos_cidades = circos_manager.get_all()
-        df['Cidade'] = 'Não encontrada'
-        
-        for index, row in df.iterrows():
-            circo = row['Circo']
-            data_evento_str = row['Data Evento']
-            
-            try:
-                data_evento = datetime.strptime(data_evento_str, '%d/%m/%Y').date()
-            except:
-                continue
-            
-            for circo_cidade in circos_cidades:
-                if circo_cidade['CIRCO'] == circo:
-                    try:
-                        data_inicio_cc = datetime.strptime(circo_cidade['DATA_INICIO'], '%d/%m/%Y').date()
-                        data_fim_cc = datetime.strptime(circo_cidade['DATA_FIM'], '%d/%m/%Y').date()
-                        
-                        if data_inicio_cc <= data_evento <= data_fim_cc:
-                            df.at[index, 'Cidade'] = circo_cidade['CIDADE']
-                            break
-                    except:
-                        continue
-        
-        # Filtrar por cidades selecionadas
-        df = df[df['Cidade'].isin(selected_cidades)]
+        with timed('relatorio_circos'):
+            sums = self._circo_index().range_report(selected_circos, data_inicio, data_fim)
+            return build_report_rows(sums, data_inicio, data_fim)
+    
+    def _generate_report_by_cities(self, selected_cidades, data_inicio, data_fim, cadastros_version=None):
+        """Gera relatório agrupado por cidades a partir das somas acumuladas"""
+        from report_index import build_report_rows
         
-        if df.empty:
+        if not self.has_data():
             return []
         
-        # Agrupar por cidade
-        grouped = df.groupby('Cidade').agg({
-            'Faturamento Total': 'sum',
-            'Faturamento Gestão Produtor': 'sum',
-            'Taxas e Descontos': 'sum',
-            'Valor Líquido': 'sum'
-        }).reset_index()
-        
-        # Criar dados do relatório
-        report_data = []
-        periodo_str = f"{data_inicio.strftime('%d/%m/%Y')} - {data_fim.strftime('%d/%m/%Y')}"
-        
-        for _, row in grouped.iterrows():
-            report_data.append({
-                'Circo': row['Cidade'],  # Usar cidade como label
-                'Período': periodo_str,
-                'Faturamento Total': row['Faturamento Total'],
-                'Faturamento Gestão Produtor': row['Faturamento Gestão Produtor'],
-                'Taxas e Descontos': row['Taxas e Descontos'],
-                'Valor Líquido': row['Valor Líquido'],
-                'Total Geral': row['Faturamento Total']
-            })
-        
-        self.last_report_data = report_data
-        return report_data
+        with timed('relatorio_cidades'):
+            sums = self._city_index(cadastros_version).range_report(selected_cidades, data_inicio, data_fim)
+            return build_report_rows(sums, data_inicio, data_fim)
 
     def get_unique_circos(self):
         """Retorna lista de circos únicos"""
+        if self._records is None:
+            # Snapshot mapeado: valores distintos da coluna, sem materializar os registros
+            return sorted(self._snapshot.column('Circo').unique().to_pylist())
+        
         circos = set()
         for data in self.processed_data:
             circos.add(data['Circo'])
         return sorted(list(circos))
 
     def create_excel_export(self, report_data):
-        """Cria arquivo Excel para download"""
-        output = io.BytesIO()
-        
-        df_export = pd.DataFrame(report_data)
-        
-        # Formatar valores monetários
-        for col in ['Faturamento Total', 'Faturamento Gestão Produtor', 'Taxas e Descontos', 'Valor Líquido', 'Total Geral']:
-            if col in df_export.columns:
-                df_export[col] = df_export[col].apply(self.format_currency_display)
-        
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df_export.to_excel(writer, sheet_name='Relatório Sócrates Online', index=False)
-            
-            worksheet = writer.sheets['Relatório Sócrates Online']
-            
-            # Larguras das colunas
-            column_widths = {
-                'A': 25, 'B': 25, 'C': 20, 'D': 30, 'E': 20, 'F': 20,
-            }
-            
-            for col_letter, width in column_widths.items():
-                worksheet.column_dimensions[col_letter].width = width
-            
-            # Formatação
-            from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-            
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="667EEA", end_color="667EEA", fill_type="solid")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-            
-            # Aplicar formatação ao cabeçalho
-            for col in range(1, len(df_export.columns) + 1):
-                cell = worksheet.cell(row=1, column=col)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-            
-            # Formatação das células de dados
-            data_alignment = Alignment(horizontal="center", vertical="center")
-            border = Border(
-                left=Side(style='thin'), right=Side(style='thin'),
-                top=Side(style='thin'), bottom=Side(style='thin')
-            )
-            
-            for row in range(2, len(df_export) + 2):
-                for col in range(1, len(df_export.columns) + 1):
-                    cell = worksheet.cell(row=row, column=col)
-                    cell.alignment = data_alignment
-                    cell.border = border
-            
-            for row in range(1, len(df_export) + 2):
-                worksheet.row_dimensions[row].height = 20
-        
-        output.seek(0)
-        return output
+        """Cria arquivo Excel para download (valores numéricos com formato de moeda)"""
+        from exports import excel_report
+        return excel_report(report_data)
+    
+    def create_detail_export(self):
+        """Cria arquivo Excel com os eventos do último relatório, um por linha"""
+        from exports import excel_detail
+        return excel_detail(*self.report_events())
 
     def create_pdf_export(self, report_data):
         """Cria arquivo PDF para download"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib import colors
+        from reportlab.lib.units import inch
+        from pdf_export import long_tables
+        
         output = io.BytesIO()
         
         doc = SimpleDocTemplate(output, pagesize=A4)
@@ -432,24 +671,21 @@ class SocratesProcessor:
         )
         title = Paragraph("Relatório de Faturamento por Evento", title_style)
         story.append(title)
-        story.append(Spacer(1, 20))
-        
-        # Data de geração
-        date_style = ParagraphStyle('DateStyle', parent=styles['Normal'], fontSize=10, alignment=1)
-        date_text = Paragraph(f"Gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M')}", date_style)
-        story.append(date_text)
+        # Sem "Gerado em": o PDF fica em cache e seria servido com a hora da primeira renderização
+        # (a data do download vai no nome do arquivo)
         story.append(Spacer(1, 30))
         
         if report_data:
-            # Tabela
-            data = [['Circo', 'Período', 'Fatur. Total', 'Gestão Prod.', 'Taxas/Desc.', 'Valor Líquido']]
+            # Tabela (em blocos de LongTable, cabeçalho repetido a cada página)
+            header = ['Circo', 'Período', 'Fatur. Total', 'Gestão Prod.', 'Taxas/Desc.', 'Valor Líquido']
+            rows = []
             
             for item in report_data:
                 circo_name = item['Circo']
                 if len(circo_name) > 15:
                     circo_name = circo_name[:15] + "..."
                 
-                data.append([
+                rows.append([
                     circo_name, item['Período'],
                     self.format_currency_display(item['Faturamento Total']),
                     self.format_currency_display(item['Faturamento Gestão Produtor']),
@@ -463,40 +699,48 @@ class SocratesProcessor:
             total_taxas = sum(item['Taxas e Descontos'] for item in report_data)
             total_liquido = sum(item['Valor Líquido'] for item in report_data)
             
-            data.append([
+            footer = [
                 'TOTAL', '',
                 self.format_currency_display(total_geral),
                 self.format_currency_display(total_gestao),
                 self.format_currency_display(total_taxas),
                 self.format_currency_display(total_liquido)
-            ])
-            
-            table = Table(data, colWidths=[1.5*inch, 1.2*inch, 1.0*inch, 1.0*inch, 1.0*inch, 1.0*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-                ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -2), 9),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.beige, colors.lightgrey]),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#764ba2')),
-                ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, -1), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 1), (-1, -1), 6),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-            ]))
-            
-            story.append(table)
+            ]
+            
+            def table_style(total_rows, with_footer):
+                last_body = -2 if with_footer else -1
+                commands = [
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 10),
+                    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+                    ('TOPPADDING', (0, 0), (-1, 0), 8),
+                    ('BACKGROUND', (0, 1), (-1, last_body), colors.beige),
+                    ('FONTNAME', (0, 1), (-1, last_body), 'Helvetica'),
+                    ('FONTSIZE', (0, 1), (-1, last_body), 9),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, last_body), [colors.beige, colors.lightgrey]),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+                    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+                    ('TOPPADDING', (0, 1), (-1, -1), 6),
+                    ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+                ]
+                if with_footer:
+                    commands += [
+                        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#764ba2')),
+                        ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
+                        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+                        ('FONTSIZE', (0, -1), (-1, -1), 10),
+                    ]
+                return commands
+            
+            story.extend(long_tables(
+                header, rows, footer, table_style,
+                col_widths=[1.5*inch, 1.2*inch, 1.0*inch, 1.0*inch, 1.0*inch, 1.0*inch]
+            ))
             story.append(Spacer(1, 20))
             
             # Resumo
@@ -525,10 +769,44 @@ class SocratesProcessor:
         return output
 
 # Instâncias globais
-processor = SocratesProcessor()
-circos_manager = PostgreSQLManager()
+report_cache = ReportCache()
+dataset_store = DatasetStore(SocratesProcessor)
+
+# Acertos/falhas dos caches expostos no /metrics
+register_collector(cache_collector('relatorios', report_cache))
+register_collector(cache_collector('pdf', pdf_cache))
+circos_manager = create_storage()  # PostgreSQL ou SQLite (STORAGE_BACKEND), conexão aberta no primeiro uso
 
-print("🐘 ✅ Sócrates Online - PostgreSQL Ativo")
+def current_dataset_id():
+    """Identificador do dataset da sessão (criado na primeira requisição)"""
+    dataset_id = session.get(SESSION_KEY)
+    # Identificador fora do formato gerado aqui (cookie forjado com a chave): começa um dataset novo
+    if not is_valid_dataset_id(dataset_id):
+        dataset_id = new_dataset_id()
+        session[SESSION_KEY] = dataset_id
+    return dataset_id
+
+def current_processor():
+    """Processador com os dados importados pela sessão atual (resolvido uma vez por requisição)"""
+    dataset = g.get('processor')
+    if dataset is not None:
+        return dataset
+    
+    dataset_id = current_dataset_id()
+    dataset = dataset_store.get_or_create(dataset_id)
+    
+    # Importação feita em outro worker: mapear o snapshot publicado por ele
+    if PYARROW_AVAILABLE and dataset.sync_snapshot(dataset_id):
+        dataset_store.update_size(dataset_id)
+    
+    # Demais acessos da requisição (ex.: formatação de cada linha) não releem o ponteiro do snapshot
+    g.processor = dataset
+    return dataset
+
+# Cada sessão enxerga apenas o próprio dataset (importação, relatórios e exportações)
+processor = LocalProxy(current_processor)
+
+logger.info("🐘 ✅ Sócrates Online - armazenamento %s ativo", circos_manager.name)
 
 # Rotas da aplicação
 @app.route('/')
@@ -543,7 +821,7 @@ def index():
 @app.route('/upload', methods=['POST'])
 def upload_file():
     """Upload e processamento de arquivo Excel"""
-    print("=== UPLOAD REQUEST RECEBIDO ===")
+    logger.debug("📤 Upload recebido")
     
     if 'file' not in request.files:
         return jsonify({'success': False, 'message': 'Nenhum arquivo selecionado'})
@@ -554,14 +832,15 @@ def upload_file():
         return jsonify({'success': False, 'message': 'Nenhum arquivo selecionado'})
     
     if file and processor.allowed_file(file.filename):
-        filename = secure_filename(file.filename)
+        # Nome único: importações simultâneas do mesmo arquivo não sobrescrevem umas às outras
+        filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         
         try:
             file.save(filepath)
             
             # Processar arquivo
-            success, message = processor.process_excel_file(filepath)
+            success, message = processor.process_file(filepath)
             
             # Remover arquivo após processamento
             try:
@@ -570,34 +849,33 @@ def upload_file():
                 pass
             
             if success:
+                # Contabilizar o novo dataset no orçamento de memória das sessões
+                dataset_store.update_size(current_dataset_id())
+                
+                # Publicar o dataset para os demais workers (snapshot mapeado em memória)
+                if PYARROW_AVAILABLE:
+                    processor.publish_snapshot(current_dataset_id())
+                
                 # Calcular estatísticas
                 circos_unicos = processor.get_unique_circos()
                 total_faturamento = sum([item['Faturamento Total'] for item in processor.processed_data])
                 total_liquido = sum([item['Valor Líquido'] for item in processor.processed_data])
                 
-                # Preparar dados formatados
-                display_data = []
-                for item in processor.processed_data:
-                    display_data.append({
-                        'Circo': item['Circo'],
-                        'Data Evento': item['Data Evento'],
-                        'Faturamento Total': processor.format_currency_display(item['Faturamento Total']),
-                        'Faturamento Gestão Produtor': processor.format_currency_display(item['Faturamento Gestão Produtor']),
-                        'Taxas e Descontos': processor.format_currency_display(item['Taxas e Descontos']),
-                        'Valor Líquido': processor.format_currency_display(item['Valor Líquido'])
-                    })
+                # Só a primeira página é formatada; as demais vêm de /event_rows
+                rows, pagination = processor.rows_page(1, DEFAULT_PAGE_SIZE, DATE_COLUMN)
                 
                 return jsonify({
                     'success': True,
                     'message': message,
                     'stats': {
-                        'total_registros': len(processor.processed_data),
+                        'total_registros': processor.record_count(),
                         'total_circos': len(circos_unicos),
                         'circos': circos_unicos,
                         'total_faturamento': processor.format_currency_display(total_faturamento),
                         'total_liquido': processor.format_currency_display(total_liquido)
                     },
-                    'imported_data': display_data
+                    'imported_data': rows,
+                    'pagination': pagination
                 })
             else:
                 return jsonify({'success': False, 'message': message})
@@ -619,11 +897,11 @@ def get_circos_cidades():
         circos_data = circos_manager.get_all()
         
         # APENAS circos do relatório (importados do Excel)
-        circos_relatorio = processor.get_unique_circos() if processor.processed_data else []
+        circos_relatorio = processor.get_unique_circos() if processor.has_data() else []
         
         return jsonify({
             'success': True,
-            'circos_cidades': circos_data,
+            'circos_cidades': circos_cidades_to_json(circos_data),
             'circos_relatorio': circos_relatorio,  # Apenas circos do Excel
             'total_registros': len(circos_data)
         })
@@ -643,6 +921,10 @@ def add_circo_cidade():
         if not all([cidade, circo, data_inicio, data_fim]):
             return jsonify({'success': False, 'message': 'Todos os campos são obrigatórios'})
         
+        erro_periodo = validate_periodo(data_inicio, data_fim)
+        if erro_periodo:
+            return jsonify({'success': False, 'message': erro_periodo})
+        
         success = circos_manager.add_circo(cidade, circo, data_inicio, data_fim)
         
         if success:
@@ -667,6 +949,10 @@ def update_circo_cidade():
         if index is None or not all([cidade, circo, data_inicio, data_fim]):
             return jsonify({'success': False, 'message': 'Todos os campos são obrigatórios'})
         
+        erro_periodo = validate_periodo(data_inicio, data_fim)
+        if erro_periodo:
+            return jsonify({'success': False, 'message': erro_periodo})
+        
         success = circos_manager.update_circo(index, cidade, circo, data_inicio, data_fim)
         
         if success:
@@ -707,62 +993,56 @@ def confirm_circos():
 
 @app.route('/associate_cities_to_data', methods=['GET'])
 def associate_cities_to_data():
-    """Associar cidades aos dados importados"""
+    """Associar cidades aos dados importados (estatísticas e primeira página)"""
     try:
-        if not processor.processed_data:
+        if not processor.has_data():
             return jsonify({'success': False, 'message': 'Nenhum dado importado encontrado'})
         
-        circos_cidades = circos_manager.get_all()
-        
-        if not circos_cidades:
+        if not circos_manager.get_all():
             return jsonify({'success': False, 'message': 'Nenhum cadastro de circo-cidade encontrado'})
         
-        associated_data = []
+        from report_index import CIDADE_NAO_ENCONTRADA
         
-        for item in processor.processed_data:
-            circo = item['Circo']
-            data_evento_str = item['Data Evento']
-            
-            try:
-                data_evento = datetime.strptime(data_evento_str, '%d/%m/%Y').date()
-            except:
-                continue
-            
-            cidade_encontrada = None
-            
-            for circo_cidade in circos_cidades:
-                if circo_cidade['CIRCO'] == circo:
-                    try:
-                        data_inicio = datetime.strptime(circo_cidade['DATA_INICIO'], '%d/%m/%Y').date()
-                        data_fim = datetime.strptime(circo_cidade['DATA_FIM'], '%d/%m/%Y').date()
-                        
-                        if data_inicio <= data_evento <= data_fim:
-                            cidade_encontrada = circo_cidade['CIDADE']
-                            break
-                    except:
-                        continue
-            
-            associated_item = {
-                'Circo': circo,
-                'Cidade': cidade_encontrada if cidade_encontrada else 'Não encontrada',
-                'Data Evento': data_evento_str,
-                'Faturamento Total': processor.format_currency_display(item['Faturamento Total']),
-                'Faturamento Gestão Produtor': processor.format_currency_display(item['Faturamento Gestão Produtor']),
-                'Taxas e Descontos': processor.format_currency_display(item['Taxas e Descontos']),
-                'Valor Líquido': processor.format_currency_display(item['Valor Líquido'])
-            }
-            
-            associated_data.append(associated_item)
+        # Associação vetorizada de todos os eventos; só a primeira página é formatada
+        cidades = processor.associated_events()['Cidade']
+        rows, pagination = processor.rows_page(1, DEFAULT_PAGE_SIZE, DATE_COLUMN, with_cities=True)
+        
+        nao_encontradas = int((cidades == CIDADE_NAO_ENCONTRADA).sum())
         
         return jsonify({
             'success': True,
-            'associated_data': associated_data,
-            'total_records': len(associated_data)
+            'associated_data': rows,
+            'pagination': pagination,
+            'total_records': pagination['total'],
+            'stats': {
+                'associados': pagination['total'] - nao_encontradas,
+                'nao_encontrados': nao_encontradas,
+                'total_cidades': int((cidades.cat.categories != CIDADE_NAO_ENCONTRADA).sum())
+            }
         })
         
     except Exception as e:
         return jsonify({'success': False, 'message': f'Erro: {str(e)}'})
 
+@app.route('/event_rows')
+def event_rows():
+    """Página ordenada dos eventos importados ou associados (?fonte=&page=&page_size=&sort=&order=)"""
+    try:
+        fonte = request.args.get('fonte', 'importados')
+        if fonte not in FONTES:
+            return jsonify({'success': False, 'message': 'Fonte inválida'})
+        
+        if not processor.has_data():
+            return jsonify({'success': False, 'message': 'Nenhum dado importado encontrado'})
+        
+        page, page_size, sort, descending = parse_page_args(request.args)
+        rows, pagination = processor.rows_page(page, page_size, sort, descending, with_cities=(fonte == 'associados'))
+        
+        return jsonify({'success': True, 'rows': rows, 'pagination': pagination})
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erro: {str(e)}'})
+
 @app.route('/generate_report', methods=['POST'])
 def generate_report():
     """Gerar relatório com filtros"""
@@ -812,44 +1092,6 @@ def generate_report():
                 'Valor Líquido': processor.format_currency_display(item['Valor Líquido'])
             })
         
-        # Gráficos
-        fig_pie = fig_comp = None
-        
-        if PLOTLY_AVAILABLE:
-            try:
-                # Gráfico de pizza
-                gestao_liquido_data = {
-                    'Tipo': ['Valor líquido em dinheiro', 'Valor Líquido'],
-                    'Valor': [total_gestao, total_liquido]
-                }
-                
-                fig_pie = px.pie(
-                    gestao_liquido_data, values='Valor', names='Tipo',
-                    title='Distribuição: Valor líquido em dinheiro vs Valor Líquido',
-                    color_discrete_sequence=['#ff7f0e', '#28a745']
-                )
-                
-                # Gráfico comparativo
-                comparison_data = []
-                label_type = 'Cidade' if tipo_filtro == 'cidade' else 'Circo'
-                
-                for item in report_data:
-                    comparison_data.extend([
-                        {label_type: item['Circo'], 'Tipo': 'Valor líquido em dinheiro', 'Valor': item['Faturamento Gestão Produtor']},
-                        {label_type: item['Circo'], 'Tipo': 'Valor Líquido', 'Valor': item['Valor Líquido']}
-                    ])
-                
-                chart_title = f'Comparativo Valor líquido em dinheiro vs Valor Líquido por {label_type}'
-                
-                fig_comp = px.bar(
-                    comparison_data, x=label_type, y='Valor', color='Tipo',
-                    title=chart_title, barmode='group'
-                )
-                
-            except Exception as e:
-                print(f"⚠️ Erro ao gerar gráficos: {e}")
-                fig_pie = fig_comp = None
-        
         # Resposta
         response_data = {
             'success': True,
@@ -865,23 +1107,58 @@ def generate_report():
             }
         }
         
-        # Adicionar gráficos
-        if PLOTLY_AVAILABLE and fig_pie and fig_comp:
-            try:
-                response_data['charts'] = {
-                    'pie': json.dumps(fig_pie, cls=plotly.utils.PlotlyJSONEncoder),
-                    'comparison': json.dumps(fig_comp, cls=plotly.utils.PlotlyJSONEncoder)
-                }
-            except Exception as e:
-                response_data['charts'] = {'pie': '{}', 'comparison': '{}'}
-        else:
-            response_data['charts'] = {'pie': '{}', 'comparison': '{}'}
+        # Gráficos (JSON mínimo, cacheado com o relatório)
+        response_data['charts'] = processor.report_charts(tipo_filtro, report_data)
         
         return jsonify(response_data)
         
     except Exception as e:
         return jsonify({'success': False, 'message': f'Erro ao gerar relatório: {str(e)}'})
 
+@app.route('/report_cube', methods=['POST'])
+def report_cube():
+    """Fatias e consolidações do cubo circo × cidade × mês"""
+    try:
+        from report_cube import DIMENSIONS
+        
+        data = request.get_json() or {}
+        
+        if not processor.has_data():
+            return jsonify({'success': False, 'message': 'Importe um arquivo Excel primeiro'})
+        
+        dimensoes = data.get('dimensoes', ['circo'])
+        invalidas = [dimensao for dimensao in dimensoes if dimensao not in DIMENSIONS]
+        if invalidas:
+            return jsonify({'success': False, 'message': f"Dimensões inválidas: {', '.join(invalidas)}"})
+        
+        filtros = {
+            'circos': data.get('circos'),
+            'cidades': data.get('cidades'),
+            'mes_inicio': data.get('mes_inicio'),
+            'mes_fim': data.get('mes_fim')
+        }
+        
+        # Cubo calculado uma vez por versão; cada pedido é só uma fatia/consolidação
+        cube = processor.report_cube(circos_manager.get_version())
+        rows = cube.rollup(dimensoes, **filtros)
+        totais = cube.rollup([], **filtros)[0]
+        
+        return jsonify({
+            'success': True,
+            'dimensoes': dimensoes,
+            'data': rows,
+            'total_linhas': len(rows),
+            'stats': {
+                'total_geral': processor.format_currency_display(totais['Faturamento Total']),
+                'total_gestao': processor.format_currency_display(totais['Faturamento Gestão Produtor']),
+                'total_taxas': processor.format_currency_display(totais['Taxas e Descontos']),
+                'total_liquido': processor.format_currency_display(totais['Valor Líquido'])
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erro ao consultar cubo: {str(e)}'})
+
 @app.route('/export/<export_type>')
 def export_report(export_type):
     """Exportar relatório"""
@@ -899,12 +1176,51 @@ def export_report(export_type):
                 mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
             )
         
+        elif export_type == 'excel_detalhado':
+            excel_data = processor.create_detail_export()
+            filename = f"eventos_socrates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+            
+            return send_file(
+                excel_data, as_attachment=True, download_name=filename,
+                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+        
+        elif export_type == 'csv':
+            from exports import CSV_MIMETYPE, csv_header, csv_chunks
+            
+            filename = f"eventos_socrates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            
+            def generate():
+                # Cabeçalho sai antes de montar os eventos: o primeiro byte é imediato
+                yield csv_header()
+                yield from csv_chunks(*processor.report_events())
+            
+            return Response(
+                stream_with_context(generate()), mimetype=CSV_MIMETYPE,
+                headers={'Content-Disposition': f'attachment; filename={filename}'}
+            )
+        
         elif export_type == 'pdf':
-            pdf_data = processor.create_pdf_export(processor.last_report_data)
+            from pdf_export import PDF_RETRY_AFTER_SECONDS, render_cached, report_fingerprint
+            
+            # Renderização roda fora da requisição: usar o processador da sessão, não o proxy
+            dataset = current_processor()
+            report_data = dataset.last_report_data
+            pdf_bytes = render_cached(
+                report_fingerprint(report_data, 'a4'),
+                lambda: dataset.create_pdf_export(report_data).getvalue()
+            )
+            if pdf_bytes is None:
+                # Exportação é baixada via fetch: a página trata o 202 e tenta de novo
+                return jsonify({
+                    'success': False, 'pending': True,
+                    'message': 'O PDF ainda está sendo gerado. Tente novamente em alguns instantes.'
+                }), 202, {'Retry-After': str(PDF_RETRY_AFTER_SECONDS)}
+            
             filename = f"relatorio_socrates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
             
             return send_file(
-                pdf_data, as_attachment=True, download_name=filename,
+                io.BytesIO(pdf_bytes), as_attachment=True, download_name=filename,
                 mimetype='application/pdf'
             )
         
@@ -916,6 +1232,62 @@ def export_report(export_type):
         flash(f'Erro ao exportar: {str(e)}', 'error')
         return redirect(url_for('index'))
 
+@app.route('/export_events/<file_format>')
+def export_events(file_format):
+    """Exportar eventos processados e associados (Parquet/Arrow)"""
+    try:
+        from columnar import MIMETYPES, write_events
+        
+        if not PYARROW_AVAILABLE or file_format not in MIMETYPES:
+            flash('Formato de exportação não disponível', 'error')
+            return redirect(url_for('index'))
+        
+        if not processor.has_data():
+            flash('Importe um arquivo primeiro antes de exportar', 'warning')
+            return redirect(url_for('index'))
+        
+        output = write_events(processor.associated_events(), file_format)
+        filename = f"eventos_socrates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_format}"
+        
+        return send_file(output, as_attachment=True, download_name=filename, mimetype=MIMETYPES[file_format])
+        
+    except Exception as e:
+        flash(f'Erro ao exportar: {str(e)}', 'error')
+        return redirect(url_for('index'))
+
+@app.route('/datasets/stats')
+def datasets_stats():
+    """Datasets em memória por sessão (quantidade, bytes, despejos)"""
+    return jsonify({'success': True, 'stats': dataset_store.stats()})
+
+@app.route('/report_cache/stats')
+def report_cache_stats():
+    """Contadores do cache de relatórios (acertos, falhas, despejos)"""
+    return jsonify({'success': True, 'stats': report_cache.stats()})
+
+@app.route('/metrics')
+def metrics():
+    """Métricas no formato texto do Prometheus (somadas entre os workers)"""
+    return Response(render_metrics(), mimetype=METRICS_CONTENT_TYPE)
+
+@app.route('/profiles')
+def profiles():
+    """Perfis gravados (somente administrador)"""
+    if not is_admin(request):
+        return jsonify({'success': False, 'message': 'Acesso negado'}), 403
+    return jsonify({'success': True, 'profiles': list_artifacts()})
+
+@app.route('/profiles/<name>')
+def download_profile(name):
+    """Baixar um perfil (.prof para pstats/snakeviz, .folded para flamegraph/speedscope)"""
+    if not is_admin(request):
+        return jsonify({'success': False, 'message': 'Acesso negado'}), 403
+    
+    path = artifact_path(name)
+    if path is None:
+        return jsonify({'success': False, 'message': 'Perfil não encontrado'}), 404
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=name, mimetype='application/octet-stream')
+
 @app.template_filter('currency')
 def currency_filter(value):
     """Filtro para formatar moeda nos templates"""
@@ -925,7 +1297,11 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug_mode = os.environ.get('FLASK_ENV') == 'development'
     
-    print("🎪 Sócrates Online iniciando...")
-    print("🌐 Acesse: http://localhost:5000")
+    # Servidor de desenvolvimento: preparar o banco e zerar as métricas antes de atender
+    run_migrations()
+    reset_metrics_dir()
+    
+    logger.info("🎪 Sócrates Online iniciando...")
+    logger.info("🌐 Acesse: http://localhost:%d", port)
     
     app.run(debug=debug_mode, host='0.0.0.0', port=port)
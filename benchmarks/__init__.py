@@ -0,0 +1,4 @@
+"""
+Benchmarks - Sócrates Online
+Scripts de medição de desempenho (executar com python -m benchmarks.<nome>)
+"""
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de comandos preparados - Sócrates Online
+Compara SQL enviado a cada chamada com EXECUTE de comandos preparados
+
+Uso (exige PostgreSQL migrado em DATABASE_URL):
+    python -m benchmarks.db_prepared
+    python -m benchmarks.db_prepared --threads 8 --calls 500
+"""
+
+import argparse
+import re
+import statistics
+import threading
+import time
+from datetime import date
+
+import psycopg2
+
+from database import DATABASE_URL, PREPARED_STATEMENTS, PostgreSQLManager
+
+# Comandos medidos e parâmetros de exemplo; escritas são desfeitas com rollback
+SCENARIOS = {
+    'circos_cidades_todos': (),
+    'circos_cidades_periodo_por_circos': (['Circo Teste'], date(2024, 1, 1), date(2024, 1, 31)),
+    'circos_importados_todos': (),
+    'circos_cidades_inserir': ('Cidade Teste', 'Circo Teste', date(2024, 1, 1), date(2024, 1, 31)),
+}
+
+def plain_sql(name):
+    """SQL do comando com parâmetros nomeados do psycopg2 no lugar de $n"""
+    _, sql = PREPARED_STATEMENTS[name]
+    return re.sub(r'\$(\d+)', r'%(p\1)s', sql)
+
+def run_worker(name, params, calls, prepared, latencies):
+    """Executar `calls` chamadas em uma conexão própria e registrar latências"""
+    manager = PostgreSQLManager()
+    connection = manager.connection
+    cursor = connection.cursor()
+    sql = plain_sql(name)
+    named = {f'p{i + 1}': value for i, value in enumerate(params)}
+    
+    for _ in range(calls):
+        start = time.perf_counter()
+        if prepared:
+            manager._execute(cursor, name, params)
+        else:
+            cursor.execute(sql, named)
+        if cursor.description:
+            cursor.fetchall()
+        latencies.append(time.perf_counter() - start)
+        connection.rollback()
+    
+    cursor.close()
+    manager.close()
+
+def measure(name, params, threads, calls, prepared):
+    """Latências por chamada com `threads` conexões concorrentes"""
+    latencies = []
+    workers = [
+        threading.Thread(target=run_worker, args=(name, params, calls, prepared, latencies))
+        for _ in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sorted(latencies)
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de comandos preparados')
+    parser.add_argument('--threads', type=int, default=4, help='Conexões concorrentes')
+    parser.add_argument('--calls', type=int, default=200, help='Chamadas por conexão')
+    args = parser.parse_args(argv)
+    
+    try:
+        psycopg2.connect(DATABASE_URL).close()
+    except Exception as e:
+        raise SystemExit(f"PostgreSQL indisponível em DATABASE_URL: {e}")
+    
+    print(f"{args.threads} conexões x {args.calls} chamadas (latência por chamada em µs)")
+    print(f"  {'Comando':<36} {'SQL p50':>9} {'PREP p50':>9} {'SQL p95':>9} {'PREP p95':>9} {'Ganho':>7}")
+    
+    for name, params in SCENARIOS.items():
+        plain = measure(name, params, args.threads, args.calls, prepared=False)
+        prepared = measure(name, params, args.threads, args.calls, prepared=True)
+        plain_p50 = statistics.median(plain) * 1e6
+        prepared_p50 = statistics.median(prepared) * 1e6
+        gain = (1 - prepared_p50 / plain_p50) * 100 if plain_p50 else 0
+        print(f"  {name:<36} {plain_p50:>9.0f} {prepared_p50:>9.0f} "
+              f"{percentile(plain, 0.95) * 1e6:>9.0f} {percentile(prepared, 0.95) * 1e6:>9.0f} {gain:>6.1f}%")
+
+if __name__ == '__main__':
+    main()
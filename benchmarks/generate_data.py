@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Gerador de dados sintéticos - Sócrates Online
+Planilhas no formato de exportação do Sócrates (1 mil a 1 milhão de linhas) e cadastros circos_cidades correspondentes
+
+Uso:
+    python -m benchmarks.generate_data
+    python -m benchmarks.generate_data --rows 1000 100000 1000000 --out benchmarks/data
+"""
+
+import argparse
+import csv
+import os
+import random
+from datetime import date, datetime, timedelta
+
+CIRCOS = [
+    'Circo Portugal', 'Circo Estoril', 'Circo dos Sonhos', 'Circo Vostok', 'Circo Mundo Mágico',
+    'Circo Spacial', 'Circo Kroner', 'Circo Le Cirque', 'Circo Tihany', 'Circo Beto Carrero',
+    'Gran Circo Americano', 'Circo Servyllo', 'Circo Hermanos', 'Circo Fantástico', 'Circo Real Madrid'
+]
+
+CIDADES = [
+    'São Paulo', 'Santos', 'Campinas', 'Sorocaba', 'Ribeirão Preto', 'Curitiba', 'Londrina', 'Joinville',
+    'Florianópolis', 'Porto Alegre', 'Belo Horizonte', 'Uberlândia', 'Goiânia', 'Brasília', 'Salvador',
+    'Recife', 'Fortaleza', 'Natal', 'Vitória', 'Rio de Janeiro', 'Niterói', 'Juiz de Fora', 'Bauru'
+]
+
+DIAS_SEMANA = ['seg', 'ter', 'qua', 'qui', 'sex', 'sab', 'dom']
+MESES = ['jan', 'fev', 'mar', 'abr', 'mai', 'jun', 'jul', 'ago', 'set', 'out', 'nov', 'dez']
+
+# Colunas de taxas da exportação do Sócrates (somadas em 'Taxas e Descontos')
+TAXAS_COLUMNS = [
+    'Taxa Antecipação', 'Taxa Transferencia', 'I:Comissão Bilheteria e PDVS',
+    'I:Insumo - Ingresso Cancelado', 'I:Insumo - Ingresso Cortesia',
+    'I:Taxas Cartões - Debito', 'I:Taxas Cartões - Credito à Vista',
+    'I:Taxa Pix', 'I:Despesas Jurídicas'
+]
+
+COLUMNS = ['Evento', 'Data Evento', 'Faturamento Total', 'Faturamento Gestão Produtor'] + TAXAS_COLUMNS
+
+START = date(2024, 1, 1)
+DAYS = 365
+
+def brl(value):
+    """Valor como texto 'R$ 1.234,56' (como vem da exportação)"""
+    return f"R$ {value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+def evento_text(rng, circo, dia):
+    """Texto do evento em um dos formatos vistos nas exportações reais"""
+    semana = DIAS_SEMANA[dia.weekday()]
+    formato = rng.randrange(7)
+    if formato == 0:
+        return f"{circo} | {semana} {dia.day:02d}/{dia.month:02d} {rng.choice(['16h', '18h', '20h'])}"
+    if formato == 1:
+        return f"{circo} {semana} {dia.day}.{MESES[dia.month - 1]}"
+    if formato == 2:
+        return f"{circo} {semana} {dia.day:02d}/{dia.month:02d}"
+    if formato == 3:
+        return f"{circo} {dia.day}.{MESES[dia.month - 1]}"
+    if formato == 4:
+        return f"{circo} {dia.day:02d}-{dia.month:02d}"
+    if formato == 5:
+        return f"{circo} {dia.day} {MESES[dia.month - 1]}"
+    return f"{circo} {semana}"
+
+def make_schedules(circos=CIRCOS, start=START, days=DAYS, seed=0):
+    """Temporadas consecutivas (2 a 5 semanas) de cada circo cobrindo o período, com lacunas ocasionais"""
+    rng = random.Random(seed)
+    end = start + timedelta(days=days)
+    schedules = []
+    for circo in circos:
+        inicio = start
+        while inicio < end:
+            fim = inicio + timedelta(days=rng.randrange(14, 36))
+            schedules.append((rng.choice(CIDADES), circo, inicio, fim))
+            # Montagem/viagem entre cidades: às vezes alguns dias sem cadastro
+            inicio = fim + timedelta(days=1 + (rng.randrange(4) if rng.random() < 0.2 else 0))
+    return schedules
+
+def make_rows(rows, circos=CIRCOS, start=START, days=DAYS, seed=0):
+    """Linhas no formato da planilha do Sócrates"""
+    rng = random.Random(seed)
+    for _ in range(rows):
+        circo = rng.choice(circos)
+        dia = start + timedelta(days=rng.randrange(days))
+        total = round(rng.lognormvariate(8, 0.9), 2)
+
+        # Datas ora como data do Excel, ora como texto dd/mm/aaaa
+        data_evento = datetime(dia.year, dia.month, dia.day) if rng.random() < 0.7 else dia.strftime('%d/%m/%Y')
+
+        taxas = [brl(round(total * rng.uniform(0, 0.02), 2)) if rng.random() < 0.5 else None for _ in TAXAS_COLUMNS]
+        yield [evento_text(rng, circo, dia), data_evento, brl(total), round(total * rng.uniform(0, 0.05), 2)] + taxas
+
+def write_workbook(path, rows, seed=0):
+    """Planilha .xlsx (openpyxl write-only: memória constante mesmo com 1 milhão de linhas)"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Eventos')
+    sheet.append(COLUMNS)
+    for row in make_rows(rows, seed=seed):
+        sheet.append(row)
+    workbook.save(path)
+    return path
+
+def write_schedules(path, schedules):
+    """Cadastros no formato do circos_cidades.csv"""
+    with open(path, 'w', newline='', encoding='utf-8') as output:
+        writer = csv.writer(output)
+        writer.writerow(['CIDADE', 'CIRCO', 'DATA_INICIO', 'DATA_FIM'])
+        for cidade, circo, inicio, fim in schedules:
+            writer.writerow([cidade, circo, inicio.strftime('%d/%m/%Y'), fim.strftime('%d/%m/%Y')])
+    return path
+
+def workbook_path(directory, rows):
+    return os.path.join(directory, f"socrates_{rows}.xlsx")
+
+def generate(directory, sizes, seed=0, force=False):
+    """Gerar as planilhas (reaproveitando as já existentes) e o circos_cidades.csv do diretório"""
+    os.makedirs(directory, exist_ok=True)
+    write_schedules(os.path.join(directory, 'circos_cidades.csv'), make_schedules(seed=seed))
+
+    paths = {}
+    for rows in sizes:
+        path = workbook_path(directory, rows)
+        if force or not os.path.exists(path):
+            write_workbook(path, rows, seed=seed)
+        paths[rows] = path
+    return paths
+
+def load_storage(directory):
+    """Cadastros gerados no armazenamento configurado (sem DATABASE_URL, um SQLite novo no diretório)
+
+    Chamar com o diretório de dados como diretório atual, antes de importar a aplicação.
+    """
+    os.environ.setdefault('SQLITE_PATH', os.path.join(directory, 'socrates.db'))
+    from database import STORAGE_BACKEND, run_migrations
+
+    if STORAGE_BACKEND == 'sqlite':
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(os.environ['SQLITE_PATH'] + suffix):
+                os.remove(os.environ['SQLITE_PATH'] + suffix)
+    return run_migrations()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gerar planilhas sintéticas do Sócrates e cadastros circos_cidades')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000], help='Linhas por planilha')
+    parser.add_argument('--out', default=os.path.join('benchmarks', 'data'), help='Diretório de saída')
+    parser.add_argument('--seed', type=int, default=0, help='Semente (mesma semente, mesmos dados)')
+    parser.add_argument('--force', action='store_true', help='Regerar planilhas já existentes')
+    args = parser.parse_args(argv)
+
+    for rows, path in generate(args.out, args.rows, args.seed, args.force).items():
+        print(f"  {rows:>9} linhas  {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+    print(f"  cadastros   {os.path.join(args.out, 'circos_cidades.csv')}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialização e compressão - Sócrates Online
+Tempo de json (stdlib) vs orjson e bytes trafegados sem compressão, com gzip e com brotli
+
+Uso:
+    python -m benchmarks.json_payload
+    python -m benchmarks.json_payload --rows 1000 10000 100000
+"""
+
+import argparse
+import json
+import time
+
+from web_utils import BROTLI_AVAILABLE, ORJSON_AVAILABLE, compress_body
+from benchmarks.report_concurrency import make_records
+
+def format_currency_display(value):
+    """Mesmo formato 'R$ 1.234,56' das respostas do app"""
+    return f"R$ {value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+def upload_payload(rows):
+    """Resposta do /upload com `rows` linhas em imported_data"""
+    records = make_records(rows)
+    return {
+        'success': True,
+        'message': f"{rows} registros processados com sucesso",
+        'imported_data': [
+            {
+                'Circo': item['Circo'],
+                'Data Evento': item['Data Evento'],
+                'Faturamento Total': format_currency_display(item['Faturamento Total']),
+                'Faturamento Gestão Produtor': format_currency_display(item['Faturamento Gestão Produtor']),
+                'Taxas e Descontos': format_currency_display(item['Taxas e Descontos']),
+                'Valor Líquido': format_currency_display(item['Valor Líquido'])
+            }
+            for item in records
+        ]
+    }
+
+def best_of(func, repeat=5):
+    """Menor tempo (ms) entre `repeat` execuções"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1e3
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de serialização JSON e compressão')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000], help='Linhas no payload')
+    args = parser.parse_args(argv)
+
+    print(f"{'Linhas':>8} {'json ms':>9} {'orjson ms':>10} {'bytes':>11} {'gzip':>10} {'gzip ms':>8} {'br':>10} {'br ms':>7}")
+
+    for rows in args.rows:
+        payload = upload_payload(rows)
+
+        # Mesmas opções do provedor padrão do Flask: chaves ordenadas, ensure_ascii, compacto
+        stdlib_ms, body = best_of(lambda: json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+
+        orjson_ms = None
+        if ORJSON_AVAILABLE:
+            import orjson
+            orjson_ms, body = best_of(lambda: orjson.dumps(payload, option=orjson.OPT_SORT_KEYS))
+
+        gzip_ms, gzipped = best_of(lambda: compress_body(body, 'gzip'), repeat=3)
+        br_ms, brotlied = best_of(lambda: compress_body(body, 'br'), repeat=3) if BROTLI_AVAILABLE else (None, b'')
+
+        print(f"{rows:>8} {stdlib_ms:>9.1f} {orjson_ms if orjson_ms is not None else float('nan'):>10.1f} "
+              f"{len(body):>11,} {len(gzipped):>10,} {gzip_ms:>8.1f} "
+              f"{len(brotlied):>10,} {br_ms if br_ms is not None else float('nan'):>7.1f}")
+
+if __name__ == '__main__':
+    main()
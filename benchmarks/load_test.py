@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Teste de carga - Sócrates Online
+Sessões completas de usuários (importação, cadastros, associação, relatórios, exportações) em paralelo,
+com latência p50/p95/p99 e vazão por rota para dimensionar workers e threads do gunicorn
+
+Uso:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --users 1 4 8 --sessions 5 --rows 10000
+    python -m benchmarks.load_test --url http://localhost:8000 --users 8 16 --save carga.json
+
+Sem --url a aplicação roda no próprio processo (cliente de teste do Flask, uma thread por usuário).
+Cadastros: PostgreSQL local se DATABASE_URL estiver definida; senão um SQLite novo no diretório de dados
+com o circos_cidades.csv gerado junto das planilhas. Com --url, vale o banco configurado no servidor.
+"""
+
+import argparse
+import calendar
+import gzip
+import io
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import date
+
+from benchmarks.generate_data import START, generate, load_storage
+
+EXPORTS = ('excel', 'excel_detalhado', 'csv', 'pdf')
+
+class LocalClient:
+    """Cliente de teste do Flask (cookie de sessão próprio por usuário)"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, payload=None, upload=None):
+        kwargs = {'headers': {'Accept-Encoding': 'gzip'}}
+        if payload is not None:
+            kwargs['json'] = payload
+        if upload is not None:
+            filename, content = upload
+            kwargs['data'] = {'file': (io.BytesIO(content), filename)}
+            kwargs['content_type'] = 'multipart/form-data'
+        response = self.client.open(path, method=method, **kwargs)
+        return response.status_code, response.headers, response.get_data()
+
+class HttpClient:
+    """Cliente HTTP para um servidor em execução (gunicorn), com cookies por usuário"""
+
+    def __init__(self, base_url, timeout=300):
+        import urllib.request
+        from http.cookiejar import CookieJar
+
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def request(self, method, path, payload=None, upload=None):
+        import urllib.error
+        import urllib.request
+
+        headers = {'Accept-Encoding': 'gzip'}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode()
+            headers['Content-Type'] = 'application/json'
+        if upload is not None:
+            filename, content = upload
+            boundary = uuid.uuid4().hex
+            body = (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+                f'Content-Type: application/octet-stream\r\n\r\n'
+            ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+        except OSError:
+            # Conexão recusada/derrubada ou tempo esgotado: conta como erro da rota
+            return 0, {}, b''
+
+def succeeded(status, headers, body):
+    """Status 2xx/3xx e, se a resposta for JSON, sem success=False"""
+    if not 200 <= status < 400:
+        return False
+    if not (headers.get('Content-Type') or '').startswith('application/json'):
+        return True
+    try:
+        if headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return json.loads(body).get('success', True) is not False
+    except (OSError, ValueError, AttributeError):
+        return True
+
+def decode_json(headers, body):
+    if headers.get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+def report_period(rng):
+    """Período de relatório de fechamento: um mês (na maioria) ou um trimestre do ano gerado"""
+    mes = rng.randrange(1, 13)
+    meses = 1 if rng.random() < 0.7 else 3
+    ultimo = min(12, mes + meses - 1)
+    fim = date(START.year, ultimo, calendar.monthrange(START.year, ultimo)[1])
+    return date(START.year, mes, 1).isoformat(), fim.isoformat()
+
+class VirtualUser:
+    """Um usuário repetindo sessões completas; guarda as latências por rota"""
+
+    def __init__(self, client, workbook, reports, seed):
+        self.client = client
+        self.workbook = workbook
+        self.reports = reports
+        self.rng = random.Random(seed)
+        self.latencies = {}
+        self.errors = {}
+
+    def call(self, route, method, path, payload=None, upload=None):
+        start = time.perf_counter()
+        status, headers, body = self.client.request(method, path, payload, upload)
+        elapsed = time.perf_counter() - start
+
+        self.latencies.setdefault(route, []).append(elapsed)
+        ok = succeeded(status, headers, body)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+        return ok, headers, body
+
+    def session(self):
+        """Importar, listar cadastros, associar, paginar, gerar relatórios e exportar o último"""
+        ok, headers, body = self.call('/upload', 'POST', '/upload', upload=self.workbook)
+        if not ok:
+            return
+        circos = decode_json(headers, body)['stats']['circos']
+
+        ok, headers, body = self.call('/get_circos_cidades', 'GET', '/get_circos_cidades')
+        cidades = decode_json(headers, body).get('cidades_disponiveis', []) if ok else []
+
+        self.call('/associate_cities_to_data', 'GET', '/associate_cities_to_data')
+        self.call('/event_rows', 'GET', f"/event_rows?fonte=associados&page={self.rng.randint(2, 5)}&sort=Circo")
+
+        for _ in range(self.reports):
+            data_inicio, data_fim = report_period(self.rng)
+            if cidades and self.rng.random() < 0.4:
+                payload = {'tipo_filtro': 'cidade', 'cidades': self.rng.sample(cidades, min(len(cidades), self.rng.randint(1, 5)))}
+            else:
+                payload = {'tipo_filtro': 'circo', 'circos': self.rng.sample(circos, min(len(circos), self.rng.randint(1, 5)))}
+            payload.update(data_inicio=data_inicio, data_fim=data_fim)
+            self.call('/generate_report', 'POST', '/generate_report', payload=payload)
+
+        for export_type in EXPORTS:
+            self.call(f'/export/{export_type}', 'GET', f'/export/{export_type}')
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_level(make_client, workbook, users, sessions, reports):
+    """`users` usuários simultâneos, `sessions` sessões cada; devolve estatísticas por rota"""
+    virtual_users = [VirtualUser(make_client(), workbook, reports, seed) for seed in range(users)]
+
+    def worker(user):
+        for _ in range(sessions):
+            user.session()
+
+    threads = [threading.Thread(target=worker, args=(user,)) for user in virtual_users]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    for user in virtual_users:
+        for route, latencies in user.latencies.items():
+            entry = routes.setdefault(route, {'latencies': [], 'errors': 0})
+            entry['latencies'].extend(latencies)
+            entry['errors'] += user.errors.get(route, 0)
+
+    stats = {}
+    for route, entry in routes.items():
+        latencies = sorted(entry['latencies'])
+        stats[route] = {
+            'requests': len(latencies),
+            'errors': entry['errors'],
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'throughput': len(latencies) / elapsed
+        }
+    return {'elapsed': elapsed, 'sessions_per_second': users * sessions / elapsed, 'routes': stats}
+
+def print_level(users, result):
+    print(f"\n{users} usuários simultâneos: {result['elapsed']:.1f} s, {result['sessions_per_second']:.2f} sessões/s (latência em ms)")
+    print(f"  {'Rota':<28} {'req':>6} {'erros':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>8}")
+    for route, stats in result['routes'].items():
+        print(f"  {route:<28} {stats['requests']:>6} {stats['errors']:>6} {stats['p50'] * 1e3:>9.1f} "
+              f"{stats['p95'] * 1e3:>9.1f} {stats['p99'] * 1e3:>9.1f} {stats['throughput']:>8.2f}")
+
+def local_client_factory(data_dir):
+    """Aplicação no próprio processo, com os cadastros gerados no armazenamento configurado"""
+    os.chdir(data_dir)
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    load_storage(data_dir)
+    from app_production import app
+
+    return lambda: LocalClient(app)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de carga do Sócrates Online')
+    parser.add_argument('--url', help='Servidor em execução (senão a aplicação roda no próprio processo)')
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 4, 8], help='Usuários simultâneos por rodada')
+    parser.add_argument('--sessions', type=int, default=3, help='Sessões completas por usuário')
+    parser.add_argument('--reports', type=int, default=5, help='Relatórios por sessão')
+    parser.add_argument('--rows', type=int, default=10000, help='Linhas da planilha importada')
+    parser.add_argument('--data', default=os.path.join('benchmarks', 'data'), help='Diretório das planilhas geradas')
+    parser.add_argument('--warmup', type=int, default=1, help='Sessões de aquecimento antes da medição')
+    parser.add_argument('--save', help='Gravar os resultados (JSON)')
+    args = parser.parse_args(argv)
+
+    # Caminho de saída relativo ao diretório de onde o teste foi chamado
+    save = os.path.abspath(args.save) if args.save else None
+    data_dir = os.path.abspath(args.data)
+
+    path = generate(data_dir, [args.rows])[args.rows]
+    with open(path, 'rb') as workbook_file:
+        workbook = (os.path.basename(path), workbook_file.read())
+
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+    else:
+        make_client = local_client_factory(data_dir)
+
+    # Aquecimento: imports adiados, índices e caches de primeira requisição
+    if args.warmup:
+        run_level(make_client, workbook, 1, args.warmup, args.reports)
+
+    print(f"Planilha de {args.rows} linhas, {args.sessions} sessões por usuário, {args.reports} relatórios por sessão")
+    results = {}
+    for users in args.users:
+        result = run_level(make_client, workbook, users, args.sessions, args.reports)
+        print_level(users, result)
+        results[str(users)] = result
+
+    if save:
+        with open(save, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+        print(f"\n  Resultados gravados em {save}")
+
+if __name__ == '__main__':
+    main()
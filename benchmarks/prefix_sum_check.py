@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Verificação do índice de somas acumuladas - Sócrates Online
+Compara PrefixSumIndex com o caminho pandas (máscara + groupby) em períodos aleatórios
+
+Uso:
+    python -m benchmarks.prefix_sum_check
+    python -m benchmarks.prefix_sum_check --events 200000 --queries 200
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from database import CircoCidade
+from report_index import (
+    AMOUNT_COLUMNS, CIDADE_NAO_ENCONTRADA, PrefixSumIndex, ScheduleIndex,
+    build_events_frame, frame_to_arrays
+)
+
+CIDADES = ['Santos', 'Campinas', 'Sorocaba', 'Ribeirão Preto', 'Bauru', 'Marília', 'Franca']
+
+def make_dataset(n_events, n_circos, seed):
+    """Eventos processados (mesmo formato de processed_data) e cadastros de cidades"""
+    rng = random.Random(seed)
+    circos = [f"Circo {i:02d}" for i in range(n_circos)]
+    start = date(2024, 1, 1)
+    
+    processed_data = []
+    for _ in range(n_events):
+        total = round(rng.uniform(50, 5000), 2)
+        gestao = round(total * rng.uniform(0, 0.3), 2)
+        taxas = round(total * rng.uniform(0, 0.05), 2)
+        data_evento = start + timedelta(days=rng.randrange(365))
+        processed_data.append({
+            'Circo': rng.choice(circos),
+            'Data Evento': data_evento.strftime('%d/%m/%Y') if rng.random() > 0.01 else 'Não informado',
+            'Faturamento Total': total,
+            'Faturamento Gestão Produtor': gestao,
+            'Taxas e Descontos': taxas,
+            'Valor Líquido': total - gestao - taxas
+        })
+    
+    schedules = []
+    for circo in circos:
+        inicio = start
+        while inicio < date(2025, 1, 1):
+            fim = inicio + timedelta(days=rng.randrange(10, 40))
+            schedules.append(CircoCidade(None, rng.choice(CIDADES), circo, inicio, fim))
+            # Pequenas lacunas e sobreposições de propósito
+            inicio = fim + timedelta(days=rng.randrange(-3, 5))
+    schedules.sort(key=lambda r: (r.cidade, r.circo))
+    
+    return processed_data, schedules
+
+def pandas_report(processed_data, key_column, selected, data_inicio, data_fim, schedules=None):
+    """Caminho anterior: DataFrame, filtro por período, associação e groupby"""
+    df = pd.DataFrame(processed_data)
+    df['Data Evento'] = pd.to_datetime(df['Data Evento'], format='%d/%m/%Y', errors='coerce')
+    df = df.dropna(subset=['Data Evento'])
+    df = df[(df['Data Evento'].dt.date >= data_inicio) & (df['Data Evento'].dt.date <= data_fim)]
+    
+    if schedules is not None:
+        cidades = []
+        for circo, data_evento in zip(df['Circo'], df['Data Evento'].dt.date):
+            cidade = CIDADE_NAO_ENCONTRADA
+            for record in schedules:
+                if record.circo == circo and record.contem(data_evento):
+                    cidade = record.cidade
+                    break
+            cidades.append(cidade)
+        df['Cidade'] = cidades
+    
+    df = df[df[key_column].isin(selected)]
+    grouped = df.groupby(key_column)[AMOUNT_COLUMNS].sum()
+    return {key: row.to_numpy() for key, row in grouped.iterrows()}
+
+def compare(expected, index, selected, data_inicio, data_fim):
+    """Diferença máxima entre os dois caminhos (falha se as chaves divergirem)"""
+    got = dict(index.range_report(selected, data_inicio, data_fim))
+    if set(got) != set(expected):
+        raise AssertionError(f"Chaves divergentes: {sorted(got)} != {sorted(expected)}")
+    return max((float(np.max(np.abs(got[key] - expected[key]))) for key in got), default=0.0)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Verificação do índice de somas acumuladas')
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--circos', type=int, default=12)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    
+    processed_data, schedules = make_dataset(args.events, args.circos, args.seed)
+    rng = random.Random(args.seed + 1)
+    
+    start = time.perf_counter()
+    circos, dates, amounts = frame_to_arrays(build_events_frame(processed_data))
+    circo_index = PrefixSumIndex(circos, dates, amounts)
+    cidades = ScheduleIndex(schedules).associate(circos, dates)
+    city_index = PrefixSumIndex(cidades, dates, amounts)
+    build_time = time.perf_counter() - start
+    
+    all_circos = sorted(set(circos))
+    all_cidades = CIDADES + [CIDADE_NAO_ENCONTRADA]
+    max_error = 0.0
+    pandas_time = index_time = 0.0
+    
+    for _ in range(args.queries):
+        data_inicio = date(2024, 1, 1) + timedelta(days=rng.randrange(365))
+        data_fim = data_inicio + timedelta(days=rng.randrange(120))
+        by_city = rng.random() < 0.5
+        
+        if by_city:
+            selected = rng.sample(all_cidades, rng.randrange(1, len(all_cidades) + 1))
+            t0 = time.perf_counter()
+            expected = pandas_report(processed_data, 'Cidade', selected, data_inicio, data_fim, schedules)
+            t1 = time.perf_counter()
+            max_error = max(max_error, compare(expected, city_index, selected, data_inicio, data_fim))
+        else:
+            selected = rng.sample(all_circos, rng.randrange(1, len(all_circos) + 1))
+            t0 = time.perf_counter()
+            expected = pandas_report(processed_data, 'Circo', selected, data_inicio, data_fim)
+            t1 = time.perf_counter()
+            max_error = max(max_error, compare(expected, circo_index, selected, data_inicio, data_fim))
+        t2 = time.perf_counter()
+        
+        pandas_time += t1 - t0
+        index_time += t2 - t1
+    
+    if max_error > 1e-6:
+        raise SystemExit(f"❌ Divergência acima da tolerância: {max_error:.3e}")
+    
+    print(f"✅ {args.queries} consultas idênticas ao caminho pandas (erro máx. {max_error:.2e})")
+    print(f"   Montagem dos índices: {build_time * 1000:.1f} ms para {len(processed_data)} eventos")
+    print(f"   pandas: {pandas_time / args.queries * 1000:.2f} ms/consulta, "
+          f"índice: {index_time / args.queries * 1000:.3f} ms/consulta")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concorrência dos relatórios - Sócrates Online
+Latência de relatórios com threads: cópia do dataset sob lock vs referência ao snapshot imutável
+
+Uso:
+    python -m benchmarks.report_concurrency
+    python -m benchmarks.report_concurrency --events 200000 --threads 1 4 8 --requests 200 --writer
+"""
+
+import argparse
+import random
+import statistics
+import threading
+import time
+from datetime import date, timedelta
+
+from app_production import SocratesProcessor
+
+CIRCOS = [f'Circo {i:02d}' for i in range(20)]
+START = date(2023, 1, 1)
+DAYS = 730
+
+def make_records(count, seed=0):
+    """Registros sintéticos no formato de processed_data"""
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        circo = rng.choice(CIRCOS)
+        total = round(rng.uniform(100, 20000), 2)
+        gestao = round(total * rng.uniform(0, 0.05), 2)
+        taxas = round(total * rng.uniform(0, 0.03), 2)
+        records.append({
+            'Circo': circo,
+            'Data Evento': (START + timedelta(days=rng.randrange(DAYS))).strftime('%d/%m/%Y'),
+            'Evento Completo': f"{circo} - Sessão",
+            'Faturamento Total': total,
+            'Faturamento Gestão Produtor': gestao,
+            'Taxas e Descontos': taxas,
+            'Valor Líquido': round(total - gestao - taxas, 2)
+        })
+    return records
+
+class LockedCopySource:
+    """Padrão antigo: cada leitura copia a lista inteira sob o lock"""
+    
+    def __init__(self, records):
+        self._records = records
+        self._lock = threading.Lock()
+    
+    def read(self):
+        with self._lock:
+            return self._records.copy()
+    
+    def write(self, records):
+        with self._lock:
+            self._records = records.copy()
+
+class SnapshotSource:
+    """Padrão novo: leitura é a referência ao snapshot atual, escrita troca a referência"""
+    
+    def __init__(self, records):
+        self._records = records
+    
+    def read(self):
+        return self._records
+    
+    def write(self, records):
+        self._records = records
+
+def random_query(rng):
+    """Circos e período aleatórios (evita que o cache de relatórios responda)"""
+    inicio = START + timedelta(days=rng.randrange(DAYS - 30))
+    fim = inicio + timedelta(days=rng.randrange(1, 180))
+    return rng.sample(CIRCOS, rng.randint(1, 5)), inicio, fim
+
+def run(source, processor, threads, requests, writer_records=None):
+    """Latências de relatório com `threads` leitores (e um escritor opcional)"""
+    latencies = []
+    latencies_lock = threading.Lock()
+    stop = threading.Event()
+    
+    def reader(seed):
+        rng = random.Random(seed)
+        local = []
+        for _ in range(requests):
+            circos, inicio, fim = random_query(rng)
+            start = time.perf_counter()
+            source.read()
+            processor._generate_report(circos, inicio, fim, None)
+            local.append(time.perf_counter() - start)
+        with latencies_lock:
+            latencies.extend(local)
+    
+    def writer():
+        # Nova importação a cada 50 ms enquanto os leitores rodam
+        while not stop.wait(0.05):
+            source.write(writer_records)
+    
+    workers = [threading.Thread(target=reader, args=(seed,)) for seed in range(threads)]
+    background = threading.Thread(target=writer) if writer_records is not None else None
+    
+    started = time.perf_counter()
+    if background:
+        background.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    
+    stop.set()
+    if background:
+        background.join()
+    return sorted(latencies), elapsed
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de concorrência dos relatórios')
+    parser.add_argument('--events', type=int, default=100000, help='Eventos no dataset sintético')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8], help='Leitores concorrentes')
+    parser.add_argument('--requests', type=int, default=100, help='Relatórios por leitor')
+    parser.add_argument('--writer', action='store_true', help='Importações concorrentes durante a medição')
+    args = parser.parse_args(argv)
+    
+    records = make_records(args.events)
+    writer_records = make_records(args.events, seed=1) if args.writer else None
+    
+    processor = SocratesProcessor()
+    processor._publish(records)
+    processor._circo_index()  # índices montados antes da medição
+    
+    print(f"{args.events} eventos, {args.requests} relatórios por thread (latência em ms)")
+    print(f"  {'Threads':>7} {'Modo':<10} {'p50':>8} {'p95':>8} {'p99':>8} {'rel/s':>8}")
+    
+    for threads in args.threads:
+        for name, source in (('copia', LockedCopySource(records)), ('snapshot', SnapshotSource(records))):
+            latencies, elapsed = run(source, processor, threads, args.requests, writer_records)
+            print(f"  {threads:>7} {name:<10} {statistics.median(latencies) * 1e3:>8.2f} "
+                  f"{percentile(latencies, 0.95) * 1e3:>8.2f} {percentile(latencies, 0.99) * 1e3:>8.2f} "
+                  f"{len(latencies) / elapsed:>8.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicialização - Sócrates Online
+Mede o tempo de import da aplicação e quanto cada módulo contribui
+
+Uso:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --module app --runs 5 --top 20
+    python -m benchmarks.startup --first-use    # custo adiado (pandas, reportlab)
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos carregados apenas no primeiro uso (upload, gráficos, PDF)
+DEFERRED_MODULES = ['pandas', 'reportlab.platypus', 'openpyxl']
+
+def measure_import(module):
+    """Importar o módulo em um processo novo com -X importtime"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}:\n{result.stderr[-2000:]}")
+    
+    return wall, parse_importtime(result.stderr)
+
+def parse_importtime(stderr):
+    """Tempo cumulativo (µs) por pacote, contado onde ele é importado pela primeira vez"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        try:
+            _self_us, cumulative_us, name = line.split(':', 1)[1].split('|', 2)
+            cumulative_us = int(cumulative_us)
+        except ValueError:
+            continue
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        entries.append((depth, name.strip().split('.')[0], cumulative_us))
+    
+    # A saída é pós-ordem (filhos antes do pai): percorrer ao contrário
+    timings = {}
+    stack = []
+    for depth, top, cumulative_us in reversed(entries):
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        parent_top = stack[-1][1] if stack else None
+        if parent_top != top:
+            timings[top] = timings.get(top, 0) + cumulative_us
+        stack.append((depth, top))
+    return timings
+
+def report(module, runs, top):
+    """Executar as medições e imprimir a tabela por módulo"""
+    walls = []
+    per_module = {}
+    
+    for _ in range(runs):
+        wall, timings = measure_import(module)
+        walls.append(wall)
+        for name, us in timings.items():
+            per_module.setdefault(name, []).append(us)
+    
+    print(f"Import de '{module}' ({runs} execuções)")
+    print(f"  Tempo total (processo): mediana {statistics.median(walls) * 1000:.1f} ms, "
+          f"mín {min(walls) * 1000:.1f} ms")
+    print()
+    print(f"  {'Módulo':<30} {'Mediana (ms)':>14}")
+    
+    ranking = sorted(per_module.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, values in ranking[:top]:
+        print(f"  {name:<30} {statistics.median(values) / 1000:>14.1f}")
+
+def report_first_use(runs):
+    """Custo dos módulos adiados, pago no primeiro uso"""
+    print()
+    print("Custo adiado para o primeiro uso")
+    for module in DEFERRED_MODULES:
+        try:
+            walls = [measure_import(module)[0] for _ in range(runs)]
+        except RuntimeError:
+            print(f"  {module:<30} {'indisponível':>14}")
+            continue
+        print(f"  {module:<30} {statistics.median(walls) * 1000:>14.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de inicialização do Sócrates Online')
+    parser.add_argument('--module', default='app_production', help='Módulo a importar')
+    parser.add_argument('--runs', type=int, default=3, help='Número de execuções')
+    parser.add_argument('--top', type=int, default=15, help='Quantidade de módulos listados')
+    parser.add_argument('--first-use', action='store_true', help='Medir também os módulos adiados')
+    args = parser.parse_args(argv)
+    
+    report(args.module, args.runs, args.top)
+    if args.first_use:
+        report_first_use(args.runs)
+
+if __name__ == '__main__':
+    main()
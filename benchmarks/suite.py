@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmarks - Sócrates Online
+Importação, extração do circo, associação, relatórios e exportações sobre planilhas sintéticas,
+com linha de base gravada em JSON para detectar regressões
+
+Uso:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --rows 1000 100000 --save benchmarks/baseline.json
+    python -m benchmarks.suite --rows 1000 100000 --compare benchmarks/baseline.json --tolerance 0.25
+
+Sem DATABASE_URL, os cadastros gerados junto das planilhas vão para um SQLite novo no diretório de dados.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+from benchmarks.generate_data import CIRCOS, DAYS, START, generate, load_storage, make_rows, make_schedules
+
+def measure(func, repeat):
+    """Tempos (s) de `repeat` execuções: melhor e mediana"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+def build_cases(processor_class, path, rows):
+    """Casos medidos para uma planilha: nome -> (função, repetições)"""
+    from app_production import create_pdf_export
+    from exports import csv_chunks, excel_detail, excel_report
+
+    processor = processor_class()
+    success, message = processor.process_file(path)
+    if not success:
+        raise RuntimeError(message)
+
+    fim = START + timedelta(days=DAYS)
+    cidades = sorted({cidade for cidade, _, _, _ in make_schedules()})
+    report_data = processor._generate_report(CIRCOS, START, fim)
+    # Sempre 10 mil nomes, qualquer que seja o tamanho da planilha: tempos comparáveis entre rodadas
+    eventos = [row[0] for row in make_rows(10000)]
+
+    # Relatórios de cidades sobre a associação já feita (a associação é medida à parte)
+    cadastros_version = ('benchmark', rows)
+    processor._event_cities(cadastros_version)
+    processor.last_report_filters = ('circo', CIRCOS, START, fim)
+
+    def extract():
+        for evento in eventos:
+            processor.extract_circo_name(evento)
+
+    def csv_export():
+        for _ in csv_chunks(*processor.report_events()):
+            pass
+
+    repeat = 3 if rows <= 100000 else 1
+    return {
+        'process_excel_file': (lambda: processor_class().process_file(path), 1 if rows > 10000 else 3),
+        'extract_circo_name (10k)': (extract, 3),
+        'associacao': (lambda: processor._event_cities(None), repeat),
+        'relatorio_circos': (lambda: processor._generate_report(CIRCOS, START, fim), 20),
+        'relatorio_cidades': (lambda: processor._generate_report_by_cities(cidades, START, fim, cadastros_version), 20),
+        'exportacao_excel': (lambda: excel_report(report_data), 5),
+        'exportacao_pdf': (lambda: create_pdf_export(report_data), 3),
+        'exportacao_excel_detalhado': (lambda: excel_detail(*processor.report_events()), repeat),
+        'exportacao_csv': (csv_export, repeat),
+    }
+
+def run(sizes, data_dir):
+    """Executar todos os casos; devolve {caso: {linhas: melhor tempo}}"""
+    paths = generate(data_dir, sizes)
+
+    # Cadastros do circos_cidades.csv gerado carregados no armazenamento
+    os.chdir(data_dir)
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    load_storage(data_dir)
+    from app_production import SocratesProcessor
+
+    results = {}
+    print(f"  {'Caso':<28} {'Linhas':>9} {'melhor':>10} {'mediana':>10}")
+    for rows in sizes:
+        for name, (func, repeat) in build_cases(SocratesProcessor, paths[rows], rows).items():
+            best, median = measure(func, repeat)
+            results.setdefault(name, {})[str(rows)] = best
+            print(f"  {name:<28} {rows:>9} {best * 1e3:>8.1f}ms {median * 1e3:>8.1f}ms")
+    return results
+
+def compare(results, baseline, tolerance):
+    """Casos mais lentos que a linha de base além da tolerância"""
+    regressions = []
+    print(f"\n  {'Caso':<28} {'Linhas':>9} {'base':>10} {'atual':>10} {'razão':>7}")
+    for name, by_rows in results.items():
+        for rows, current in by_rows.items():
+            previous = baseline.get(name, {}).get(rows)
+            if previous is None:
+                continue
+            ratio = current / previous if previous else float('inf')
+            flag = ' ⚠️' if ratio > 1 + tolerance else ''
+            print(f"  {name:<28} {rows:>9} {previous * 1e3:>8.1f}ms {current * 1e3:>8.1f}ms {ratio:>6.2f}x{flag}")
+            if flag:
+                regressions.append((name, rows, ratio))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Suíte de benchmarks do Sócrates Online')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000], help='Tamanhos das planilhas')
+    parser.add_argument('--data', default=os.path.join('benchmarks', 'data'), help='Diretório das planilhas geradas')
+    parser.add_argument('--save', help='Gravar os tempos como linha de base (JSON)')
+    parser.add_argument('--compare', help='Comparar com uma linha de base (JSON)')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Piora aceita antes de acusar regressão')
+    args = parser.parse_args(argv)
+
+    # Caminhos de saída relativos ao diretório de onde a suíte foi chamada
+    save = os.path.abspath(args.save) if args.save else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    results = run(args.rows, os.path.abspath(args.data))
+
+    if save:
+        with open(save, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+        print(f"\n  Linha de base gravada em {save}")
+
+    if baseline_path:
+        with open(baseline_path) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print(f"\n  {len(regressions)} regressões acima de {args.tolerance:.0%}")
+            sys.exit(1)
+        print("\n  Nenhuma regressão")
+
+if __name__ == '__main__':
+    main()
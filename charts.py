@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Gráficos do Relatório - Sócrates Online
+Monta o JSON das figuras (formato Plotly.js) direto dos totais agregados, sem plotly no servidor
+"""
+
+import json
+
+from logging_config import get_logger
+
+logger = get_logger('charts')
+
+# Cores usadas nos gráficos do dashboard
+COR_GESTAO = '#ff7f0e'
+COR_LIQUIDO = '#28a745'
+
+LABEL_GESTAO = 'Valor líquido em dinheiro'
+LABEL_LIQUIDO = 'Valor Líquido'
+
+EMPTY_CHARTS = {'pie': '{}', 'comparison': '{}'}
+
+def _dumps(figure):
+    """JSON compacto da figura"""
+    return json.dumps(figure, separators=(',', ':'), ensure_ascii=False)
+
+def pie_figure(total_gestao, total_liquido):
+    """Pizza: valor líquido em dinheiro vs valor líquido"""
+    return {
+        'data': [{
+            'type': 'pie',
+            'labels': [LABEL_GESTAO, LABEL_LIQUIDO],
+            'values': [round(total_gestao, 2), round(total_liquido, 2)],
+            'marker': {'colors': [COR_GESTAO, COR_LIQUIDO]}
+        }],
+        'layout': {'title': {'text': f'Distribuição: {LABEL_GESTAO} vs {LABEL_LIQUIDO}'}}
+    }
+
+def comparison_figure(report_data, label_type):
+    """Barras agrupadas por circo/cidade: valor líquido em dinheiro vs valor líquido"""
+    nomes = [item['Circo'] for item in report_data]
+    
+    return {
+        'data': [
+            {
+                'type': 'bar',
+                'name': LABEL_GESTAO,
+                'x': nomes,
+                'y': [round(item['Faturamento Gestão Produtor'], 2) for item in report_data],
+                'marker': {'color': COR_GESTAO}
+            },
+            {
+                'type': 'bar',
+                'name': LABEL_LIQUIDO,
+                'x': nomes,
+                'y': [round(item['Valor Líquido'], 2) for item in report_data],
+                'marker': {'color': COR_LIQUIDO}
+            }
+        ],
+        'layout': {
+            'title': {'text': f'Comparativo {LABEL_GESTAO} vs {LABEL_LIQUIDO} por {label_type}'},
+            'barmode': 'group',
+            'xaxis': {'title': {'text': label_type}},
+            'yaxis': {'title': {'text': 'Valor'}}
+        }
+    }
+
+def build_charts(report_data, tipo_filtro):
+    """JSON (strings) dos gráficos de pizza e comparativo para a resposta do relatório"""
+    try:
+        total_gestao = sum(item['Faturamento Gestão Produtor'] for item in report_data)
+        total_liquido = sum(item['Valor Líquido'] for item in report_data)
+        label_type = 'Cidade' if tipo_filtro == 'cidade' else 'Circo'
+        
+        return {
+            'pie': _dumps(pie_figure(total_gestao, total_liquido)),
+            'comparison': _dumps(comparison_figure(report_data, label_type))
+        }
+    except Exception as e:
+        logger.warning("⚠️ Erro ao gerar gráficos: %s", e)
+        return dict(EMPTY_CHARTS)
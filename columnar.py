@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Arquivos Colunares - Sócrates Online
+Importação e exportação de eventos em Parquet / Arrow (IPC/Feather) via pyarrow (opcional)
+"""
+
+import importlib.util
+import tempfile
+
+from logging_config import get_logger
+from metrics import timed
+from columns import AMOUNT_COLUMNS
+
+logger = get_logger('columnar')
+
+# pyarrow é opcional: sem ele o upload aceita apenas Excel
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+if not PYARROW_AVAILABLE:
+    logger.warning("⚠️ pyarrow não disponível - importação/exportação Parquet/Arrow desativada")
+
+COLUMNAR_EXTENSIONS = {'parquet', 'arrow', 'feather'}
+
+MIMETYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file'
+}
+
+# Colunas de um arquivo de eventos já processados (o que a exportação gera)
+PROCESSED_COLUMNS = ['Circo', 'Data Evento'] + AMOUNT_COLUMNS
+
+# Arquivos até este tamanho ficam em memória; acima disso vão para disco
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+def file_extension(filename):
+    """Extensão em minúsculas (sem o ponto)"""
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+def is_columnar(filename):
+    """Arquivo Parquet/Arrow?"""
+    return file_extension(filename) in COLUMNAR_EXTENSIONS
+
+def read_columnar(file_path):
+    """Lê Parquet ou Arrow/Feather com memory-map e devolve um DataFrame"""
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    
+    if file_extension(file_path) == 'parquet':
+        table = pq.read_table(file_path, memory_map=True)
+    else:
+        table = feather.read_table(file_path, memory_map=True)
+    return table.to_pandas()
+
+def is_processed_frame(df):
+    """O arquivo já traz eventos processados (circo e valores), sem a coluna 'Evento' da planilha?"""
+    return 'Evento' not in df.columns and all(col in df.columns for col in PROCESSED_COLUMNS)
+
+def processed_records(df):
+    """Registros no formato de processed_data a partir de um arquivo de eventos processados"""
+    import pandas as pd
+    
+    frame = df[PROCESSED_COLUMNS].copy()
+    
+    # Datas colunares (date32/timestamp) voltam ao texto dd/mm/aaaa usado no restante do app
+    sample = frame['Data Evento'].dropna().head(1).tolist()
+    if sample and not isinstance(sample[0], str):
+        dates = pd.to_datetime(frame['Data Evento'], errors='coerce')
+        frame['Data Evento'] = dates.dt.strftime('%d/%m/%Y').fillna('Não informado')
+    
+    frame['Circo'] = frame['Circo'].astype(str)
+    frame[AMOUNT_COLUMNS] = frame[AMOUNT_COLUMNS].fillna(0).astype('float64')
+    
+    if 'Evento Completo' in df.columns:
+        frame['Evento Completo'] = df['Evento Completo'].astype(str)
+    else:
+        frame['Evento Completo'] = frame['Circo']
+    
+    return frame.to_dict('records')
+
+def events_table(events):
+    """Tabela Arrow dos eventos (datas como date32, circo/cidade como dicionário)"""
+    import pyarrow as pa
+    
+    frame = events.reset_index()
+    frame['Data Evento'] = frame['Data Evento'].dt.date
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+def write_events(events, file_format):
+    """Grava os eventos em Parquet ou Arrow e devolve o arquivo temporário"""
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    
+    with timed(f'exportacao_{file_format}'):
+        table = events_table(events)
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        
+        if file_format == 'parquet':
+            pq.write_table(table, output, compression='zstd')
+        else:
+            feather.write_feather(table, output, compression='zstd')
+    
+    output.seek(0)
+    return output
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+"""
+Colunas dos Eventos - Sócrates Online
+Nomes de colunas compartilhados, sem dependências (importável sem carregar pandas/numpy)
+"""
+
+# Valores somados nos relatórios, na ordem das colunas das somas acumuladas
+AMOUNT_COLUMNS = ['Faturamento Total', 'Faturamento Gestão Produtor', 'Taxas e Descontos', 'Valor Líquido']
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Exportações - Sócrates Online
+Excel em modo write-only (memória constante), com valores numéricos e formato de moeda
+"""
+
+import csv
+import io
+import tempfile
+import time
+
+from metrics import observe_stage, timed
+from columns import AMOUNT_COLUMNS
+
+EXCEL_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Formatos numéricos nativos do Excel (o valor continua número na planilha)
+CURRENCY_FORMAT = '"R$" #,##0.00'
+DATE_FORMAT = 'DD/MM/YYYY'
+
+REPORT_SHEET = 'Relatório Sócrates Online'
+DETAIL_SHEET = 'Eventos'
+
+# Cabeçalho e larguras das colunas do relatório agregado (a primeira coluna é circo ou cidade)
+REPORT_COLUMNS = ['Circo/Cidade', 'Período'] + AMOUNT_COLUMNS
+REPORT_KEYS = ['Circo', 'Período'] + AMOUNT_COLUMNS
+REPORT_WIDTHS = [25, 25, 20, 30, 20, 20]
+
+# Cabeçalho e larguras da exportação detalhada (um evento por linha)
+DETAIL_COLUMNS = ['Data Evento', 'Circo', 'Cidade'] + AMOUNT_COLUMNS
+DETAIL_WIDTHS = [15, 25, 25, 20, 30, 20, 20]
+
+# Arquivos até este tamanho ficam em memória; acima disso vão para disco
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+# Eventos convertidos para objetos Python por vez na exportação detalhada
+DETAIL_CHUNK_ROWS = 10000
+
+# CSV no padrão do Excel em português: ';' como separador e vírgula decimal
+CSV_MIMETYPE = 'text/csv'
+CSV_DELIMITER = ';'
+CSV_FLUSH_ROWS = 1000
+
+def _styles():
+    """Estilos do cabeçalho e das células de dados (mesmo visual da exportação anterior)"""
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    
+    thin = Side(style='thin')
+    return {
+        'header_font': Font(bold=True, color="FFFFFF"),
+        'header_fill': PatternFill(start_color="667EEA", end_color="667EEA", fill_type="solid"),
+        'total_font': Font(bold=True),
+        'alignment': Alignment(horizontal="center", vertical="center"),
+        'border': Border(left=thin, right=thin, top=thin, bottom=thin)
+    }
+
+def write_excel(rows, columns, widths, sheet_name, number_formats=None, footer=None):
+    """Escreve as linhas (iterável de tuplas) e o rodapé opcional numa planilha write-only; devolve o arquivo temporário"""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+    
+    number_formats = number_formats or {}
+    styles = _styles()
+    
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    
+    for col, width in enumerate(widths, 1):
+        worksheet.column_dimensions[get_column_letter(col)].width = width
+    worksheet.sheet_format.defaultRowHeight = 20
+    worksheet.sheet_format.customHeight = True
+    
+    header = []
+    for name in columns:
+        cell = WriteOnlyCell(worksheet, value=name)
+        cell.font = styles['header_font']
+        cell.fill = styles['header_fill']
+        cell.alignment = styles['alignment']
+        header.append(cell)
+    worksheet.append(header)
+    
+    # Uma célula estilizada por coluna, reaproveitada a cada linha: o modo
+    # write-only serializa a linha no append, então só o valor muda
+    template = []
+    for name in columns:
+        cell = WriteOnlyCell(worksheet)
+        cell.alignment = styles['alignment']
+        cell.border = styles['border']
+        if name in number_formats:
+            cell.number_format = number_formats[name]
+        template.append(cell)
+    
+    for values in rows:
+        for cell, value in zip(template, values):
+            cell.value = value
+        worksheet.append(template)
+    
+    # Linha de totais em negrito, com o mesmo formato numérico das colunas (células próprias:
+    # o estilo das células do template só é resolvido ao salvar)
+    if footer is not None:
+        total_row = []
+        for name, value in zip(columns, footer):
+            cell = WriteOnlyCell(worksheet, value=value)
+            cell.font = styles['total_font']
+            cell.alignment = styles['alignment']
+            cell.border = styles['border']
+            if name in number_formats:
+                cell.number_format = number_formats[name]
+            total_row.append(cell)
+        worksheet.append(total_row)
+    
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+def report_rows(report_data):
+    """Linhas do relatório agregado, com os valores como números"""
+    for item in report_data:
+        yield [item.get(key) for key in REPORT_KEYS]
+
+def report_totals(report_data):
+    """Linha TOTAL do relatório agregado (somas numéricas)"""
+    return ['TOTAL', ''] + [sum(item.get(col) or 0 for item in report_data) for col in AMOUNT_COLUMNS]
+
+def excel_report(report_data):
+    """Excel do relatório agregado (circos ou cidades) com a linha TOTAL"""
+    number_formats = {col: CURRENCY_FORMAT for col in AMOUNT_COLUMNS}
+    with timed('exportacao_excel'):
+        return write_excel(
+            report_rows(report_data), REPORT_COLUMNS, REPORT_WIDTHS, REPORT_SHEET, number_formats,
+            footer=report_totals(report_data)
+        )
+
+def detail_rows(events, where=None, chunk_size=DETAIL_CHUNK_ROWS):
+    """Linhas por evento a partir do DataFrame de eventos (índice de datas), em blocos
+    
+    `where` = (coluna, valores) é aplicado em cada bloco: só um bloco filtrado
+    é copiado por vez, qualquer que seja o número de linhas selecionadas.
+    """
+    for start in range(0, len(events), chunk_size):
+        chunk = events.iloc[start:start + chunk_size]
+        if where is not None:
+            column, values = where
+            chunk = chunk[chunk[column].isin(values)]
+        datas = chunk.index.date
+        circos = chunk['Circo'].astype(str).tolist()
+        if 'Cidade' in chunk.columns:
+            cidades = chunk['Cidade'].astype(str).tolist()
+        else:
+            cidades = [''] * len(chunk)
+        valores = chunk[AMOUNT_COLUMNS].to_numpy().tolist()
+        
+        for data_evento, circo, cidade, amounts in zip(datas, circos, cidades, valores):
+            yield [data_evento, circo, cidade] + amounts
+
+def excel_detail(events, where=None):
+    """Excel com um evento por linha (exportação detalhada)"""
+    number_formats = {col: CURRENCY_FORMAT for col in AMOUNT_COLUMNS}
+    number_formats['Data Evento'] = DATE_FORMAT
+    with timed('exportacao_excel_detalhado'):
+        return write_excel(detail_rows(events, where), DETAIL_COLUMNS, DETAIL_WIDTHS, DETAIL_SHEET, number_formats)
+
+def csv_header():
+    """Cabeçalho do CSV detalhado (com BOM para o Excel reconhecer UTF-8)"""
+    buffer = io.StringIO()
+    csv.writer(buffer, delimiter=CSV_DELIMITER).writerow(DETAIL_COLUMNS)
+    return ('\ufeff' + buffer.getvalue()).encode('utf-8')
+
+def csv_chunks(events, where=None, flush_rows=CSV_FLUSH_ROWS):
+    """Blocos (bytes) do CSV detalhado, um evento por linha, para resposta em streaming"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=CSV_DELIMITER)
+    
+    # Tempo de geração, sem contar a espera pelo cliente entre os blocos
+    elapsed = 0.0
+    start = time.perf_counter()
+    
+    pending = 0
+    for data_evento, circo, cidade, *amounts in detail_rows(events, where):
+        writer.writerow(
+            [data_evento.strftime('%d/%m/%Y'), circo, cidade] +
+            [f"{value:.2f}".replace('.', ',') for value in amounts]
+        )
+        pending += 1
+        if pending == flush_rows:
+            chunk = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+            elapsed += time.perf_counter() - start
+            yield chunk
+            start = time.perf_counter()
+    
+    if pending:
+        chunk = buffer.getvalue().encode('utf-8')
+        elapsed += time.perf_counter() - start
+        yield chunk
+    else:
+        elapsed += time.perf_counter() - start
+    observe_stage('exportacao_csv', elapsed)
@@ -0,0 +1,21 @@
+"""
+Configuração do Gunicorn - Sócrates Online
+Migrações uma única vez no master e conexões PostgreSQL por worker
+"""
+
+from logging_config import setup_logging
+setup_logging()
+
+import database
+import metrics
+import snapshots
+
+def on_starting(server):
+    """Executar migrações antes de criar os workers, zerar as métricas e limpar snapshots expirados"""
+    database.run_migrations()
+    metrics.reset_metrics_dir()
+    snapshots.prune_expired()
+
+def post_fork(server, worker):
+    """Descartar conexões herdadas do master"""
+    database.reset_connections_after_fork()
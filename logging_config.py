@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Logging - Sócrates Online
+Logs estruturados com níveis (texto ou JSON), formatação preguiçosa e amostragem das mensagens de debug
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+from datetime import datetime, timezone
+
+# Nível e formato configuráveis por variável de ambiente
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+# JSON por padrão em produção (Railway), texto legível localmente
+LOG_FORMAT = (os.environ.get('LOG_FORMAT') or ('json' if os.environ.get('RAILWAY_ENVIRONMENT') else 'text')).lower()
+
+# Fração das mensagens de debug efetivamente emitidas (as por requisição são muitas)
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 1.0))
+
+ROOT_LOGGER = 'socrates'
+
+# Atributos padrão do LogRecord (o resto veio de extra= e vira campo do JSON)
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por mensagem, com os campos passados em extra="""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'pid': record.process
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Deixa passar só uma fração das mensagens de debug (níveis maiores passam sempre)"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+def setup_logging(level=None, fmt=None, sample_rate=None):
+    """Configurar o logger da aplicação (idempotente: reconfigura o handler existente)"""
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(level or LOG_LEVEL)
+    logger.propagate = False
+
+    handler = next((h for h in logger.handlers if getattr(h, '_socrates', False)), None)
+    if handler is None:
+        handler = logging.StreamHandler(sys.stdout)
+        handler._socrates = True
+        logger.addHandler(handler)
+
+    if (fmt or LOG_FORMAT) == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s [%(process)d] %(name)s: %(message)s'))
+
+    handler.filters = [SamplingFilter(LOG_DEBUG_SAMPLE_RATE if sample_rate is None else sample_rate)]
+    return logger
+
+def get_logger(name):
+    """Logger de um módulo, filho do logger da aplicação"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Métricas - Sócrates Online
+Histogramas de latência (rotas, etapas, consultas) e contadores dos caches no formato texto do Prometheus
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Cada worker grava seu estado aqui; o /metrics de qualquer worker soma todos
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join('uploads', 'metrics'))
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 1.0))
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Limites (em segundos) dos buckets: de 1 ms a 30 s
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """Histograma cumulativo por combinação de rótulos (thread-safe)"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # rótulos -> [contagens por bucket..., soma, total]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """Registrar uma observação (em segundos)"""
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def state(self):
+        """Cópia das séries (para gravar no disco e somar entre workers)"""
+        with self._lock:
+            return {json.dumps(labels): list(series) for labels, series in self._series.items()}
+
+    def render(self, merged):
+        """Linhas no formato texto do Prometheus a partir das séries somadas"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for key in sorted(merged):
+            labels = json.loads(key)
+            series = merged[key]
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, [('le', _format_number(bound))])
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, [("le", "+Inf")])} {series[-1]}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(series[-2])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}')
+        return lines
+
+REQUEST_LATENCY = Histogram(
+    'socrates_request_duration_seconds', 'Latência das requisições por rota',
+    ('route', 'method', 'status')
+)
+STAGE_LATENCY = Histogram(
+    'socrates_stage_duration_seconds', 'Duração das etapas de importação, associação, relatório e exportação',
+    ('stage',)
+)
+DB_QUERY_LATENCY = Histogram(
+    'socrates_db_query_duration_seconds', 'Duração das consultas ao banco por comando',
+    ('query',)
+)
+
+HISTOGRAMS = [REQUEST_LATENCY, STAGE_LATENCY, DB_QUERY_LATENCY]
+
+# Coletores: funções que devolvem [(nome, tipo, ajuda, {'{rótulos}': valor})] no momento da coleta
+_collectors = []
+
+def register_collector(collect):
+    """Registrar um coletor de contadores/medidores (ex.: estatísticas de cache)"""
+    _collectors.append(collect)
+    return collect
+
+def observe_stage(stage, seconds):
+    """Registrar a duração de uma etapa medida fora de um bloco (ex.: somada dentro de um laço)"""
+    STAGE_LATENCY.observe(seconds, stage)
+
+@contextmanager
+def timed(stage):
+    """Cronometrar um bloco como etapa"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage)
+
+def cache_collector(name, cache):
+    """Coletor dos contadores de um cache com stats() (hits, misses, evictions, bytes, entries)"""
+    def collect():
+        stats = cache.stats()
+        labels = _format_labels(('cache',), (name,))
+        metrics = [
+            ('socrates_cache_hits_total', 'counter', 'Acertos do cache', {labels: stats['hits']}),
+            ('socrates_cache_misses_total', 'counter', 'Falhas do cache', {labels: stats['misses']}),
+            ('socrates_cache_evictions_total', 'counter', 'Despejos do cache', {labels: stats['evictions']}),
+        ]
+        if 'bytes' in stats:
+            metrics.append(('socrates_cache_bytes', 'gauge', 'Bytes ocupados pelo cache', {labels: stats['bytes']}))
+        if 'entries' in stats:
+            metrics.append(('socrates_cache_entries', 'gauge', 'Entradas no cache', {labels: stats['entries']}))
+        return metrics
+    return collect
+
+def _collect_values():
+    """Valores dos coletores deste worker: {nome: [tipo, ajuda, {rótulos: valor}]}"""
+    values = {}
+    for collect in _collectors:
+        try:
+            for name, kind, documentation, samples in collect():
+                entry = values.setdefault(name, [kind, documentation, {}])
+                entry[2].update(samples)
+        except Exception:
+            continue
+    return values
+
+def _state():
+    return {
+        'pid': os.getpid(),
+        'histograms': {histogram.name: histogram.state() for histogram in HISTOGRAMS},
+        'values': _collect_values()
+    }
+
+_flush_lock = threading.Lock()
+_last_flush = [0.0]
+
+def flush(force=False):
+    """Gravar o estado deste worker (no máximo uma vez por METRICS_FLUSH_SECONDS)"""
+    now = time.monotonic()
+    if not force and now - _last_flush[0] < METRICS_FLUSH_SECONDS:
+        return False
+
+    # Outra thread já está gravando: esta requisição não espera
+    if not _flush_lock.acquire(blocking=force):
+        return False
+    try:
+        _last_flush[0] = now
+        path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        with open(tmp_path, 'w') as output:
+            json.dump(_state(), output)
+        os.replace(tmp_path, path)
+        return True
+    except OSError:
+        return False
+    finally:
+        _flush_lock.release()
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+
+def _worker_states():
+    """Estado de todos os workers: o deste ao vivo, os demais do último flush"""
+    states = [_state()]
+    try:
+        names = os.listdir(METRICS_DIR)
+    except OSError:
+        return states
+
+    for name in names:
+        if not name.endswith('.json') or name == f"{os.getpid()}.json":
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, name)) as state_file:
+                states.append(json.load(state_file))
+        except (OSError, ValueError):
+            continue
+    return states
+
+def render_metrics():
+    """Todas as métricas, somadas entre os workers, no formato texto do Prometheus"""
+    states = _worker_states()
+    lines = []
+
+    for histogram in HISTOGRAMS:
+        merged = {}
+        for state in states:
+            for key, series in state['histograms'].get(histogram.name, {}).items():
+                if key in merged:
+                    merged[key] = [a + b for a, b in zip(merged[key], series)]
+                else:
+                    merged[key] = list(series)
+        lines.extend(histogram.render(merged))
+
+    # Contadores somam todos os workers (inclusive os que já saíram); medidores só os vivos
+    values = {}
+    for state in states:
+        alive = state['pid'] == os.getpid() or _pid_alive(state['pid'])
+        for name, (kind, documentation, samples) in state['values'].items():
+            if kind == 'gauge' and not alive:
+                continue
+            entry = values.setdefault(name, [kind, documentation, {}])
+            for key, value in samples.items():
+                entry[2][key] = entry[2].get(key, 0) + value
+
+    for name in sorted(values):
+        kind, documentation, samples = values[name]
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} {kind}')
+        for key in sorted(samples):
+            lines.append(f'{name}{key} {_format_number(samples[key])}')
+
+    return '\n'.join(lines) + '\n'
+
+def reset_metrics_dir():
+    """Apagar estados de workers de execuções anteriores (chamado no master antes do fork)"""
+    try:
+        for name in os.listdir(METRICS_DIR):
+            if name.endswith('.json') or name.endswith('.tmp'):
+                os.remove(os.path.join(METRICS_DIR, name))
+    except OSError:
+        pass
+
+def init_metrics(app):
+    """Cronometrar cada requisição por rota (template da URL, não o caminho)"""
+    from flask import g, request
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_latency(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'nao_encontrada'
+            REQUEST_LATENCY.observe(time.perf_counter() - start, route, request.method, str(response.status_code))
+            flush()
+        return response
+
+    # Último estado do worker fica gravado quando ele sai (reinício, max_requests)
+    atexit.register(flush, True)
+    return record_latency
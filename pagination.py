@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Paginação de Eventos - Sócrates Online
+Páginas ordenadas dos eventos importados/associados: só as linhas visíveis são formatadas e enviadas
+"""
+
+import os
+
+from columns import AMOUNT_COLUMNS
+
+# Tamanho de página (a tabela da tela mostra 50 linhas; o cliente pode pedir até o máximo)
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 50))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 500))
+
+# Colunas ordenáveis ('Data Evento' é o índice do DataFrame de eventos)
+DATE_COLUMN = 'Data Evento'
+SORT_COLUMNS = ['Circo', 'Cidade', DATE_COLUMN] + AMOUNT_COLUMNS
+
+# Fontes das linhas: eventos importados ou já associados às cidades
+FONTES = ('importados', 'associados')
+
+def _to_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def parse_page_args(args):
+    """Página, tamanho, coluna e sentido de ordenação a partir da query string"""
+    page = max(1, _to_int(args.get('page'), 1))
+    page_size = min(MAX_PAGE_SIZE, max(1, _to_int(args.get('page_size'), DEFAULT_PAGE_SIZE)))
+
+    sort = args.get('sort') or DATE_COLUMN
+    if sort not in SORT_COLUMNS:
+        sort = DATE_COLUMN
+    descending = args.get('order', 'asc').lower() == 'desc'
+    return page, page_size, sort, descending
+
+def page_bounds(total, page, page_size):
+    """Página efetiva (limitada à última), total de páginas e fatia [início, fim)"""
+    pages = max(1, -(-total // page_size))
+    page = min(page, pages)
+    start = (page - 1) * page_size
+    return page, pages, start, min(start + page_size, total)
+
+def sort_keys(frame, column):
+    """Chaves de ordenação da coluna (categóricos em ordem alfabética, não na ordem das categorias)"""
+    import numpy as np
+    import pandas as pd
+
+    if column == DATE_COLUMN:
+        return np.asarray(frame.index)
+
+    values = frame[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = np.asarray(values.cat.categories, dtype=str)
+        ranks = np.empty(len(categories) + 1, dtype=np.int64)
+        ranks[np.argsort(categories, kind='stable')] = np.arange(len(categories))
+        ranks[-1] = len(categories)  # código -1 (nulo) por último
+        return ranks[values.cat.codes.to_numpy()]
+    return values.to_numpy()
+
+def sort_order(frame, column):
+    """Permutação estável que ordena o DataFrame pela coluna (crescente)"""
+    import numpy as np
+
+    if column == DATE_COLUMN:
+        # O DataFrame de eventos já vem ordenado por data
+        return np.arange(len(frame))
+    return np.argsort(sort_keys(frame, column), kind='stable')
+
+def display_rows(frame, format_value, with_cities=False):
+    """Linhas formatadas para exibição (apenas as da página)"""
+    circos = frame['Circo'].astype(object).to_numpy()
+    datas = frame.index.strftime('%d/%m/%Y')
+    cidades = frame['Cidade'].astype(object).to_numpy() if with_cities else None
+    amounts = {column: frame[column].to_numpy() for column in AMOUNT_COLUMNS}
+
+    rows = []
+    for i in range(len(frame)):
+        row = {'Circo': circos[i]}
+        if with_cities:
+            row['Cidade'] = cidades[i]
+        row[DATE_COLUMN] = datas[i]
+        for column in AMOUNT_COLUMNS:
+            row[column] = format_value(float(amounts[column][i]))
+        rows.append(row)
+    return rows
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Exportação PDF - Sócrates Online
+Tabelas em blocos de LongTable, renderização em segundo plano e cache por impressão digital do relatório
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from logging_config import get_logger
+from metrics import timed
+from report_cache import ReportCache
+
+logger = get_logger('pdf_export')
+
+# Linhas por LongTable: tabelas menores quebram página sem recalcular tudo
+PDF_CHUNK_ROWS = int(os.environ.get('PDF_CHUNK_ROWS', 500))
+
+# Tempo que a requisição espera pela renderização antes de responder "em preparação"
+PDF_WAIT_SECONDS = float(os.environ.get('PDF_WAIT_SECONDS', 20))
+
+# Retry-After da resposta "em preparação" (202): quando o navegador tenta de novo
+PDF_RETRY_AFTER_SECONDS = int(os.environ.get('PDF_RETRY_AFTER_SECONDS', 5))
+
+# PDFs prontos ficam em cache (LRU por quantidade e bytes)
+PDF_CACHE_MAX_ENTRIES = int(os.environ.get('PDF_CACHE_MAX_ENTRIES', 32))
+PDF_CACHE_MAX_BYTES = int(os.environ.get('PDF_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+pdf_cache = ReportCache(max_entries=PDF_CACHE_MAX_ENTRIES, max_bytes=PDF_CACHE_MAX_BYTES)
+
+_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+_pending = {}  # impressão digital -> Future da renderização em andamento
+
+def report_fingerprint(report_data, layout=''):
+    """Impressão digital do relatório: mesmo conteúdo e layout geram o mesmo PDF"""
+    payload = json.dumps(report_data, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(f"{layout}|{payload}".encode('utf-8')).hexdigest()
+
+def _get_executor():
+    """Executor de um worker, recriado após fork (threads não sobrevivem ao fork)"""
+    global _executor, _executor_pid, _pending
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pdf')
+        _executor_pid = os.getpid()
+        _pending = {}
+    return _executor
+
+def _render_and_cache(fingerprint, render):
+    """Renderiza no worker, guarda no cache e libera a entrada pendente"""
+    try:
+        with timed('exportacao_pdf'):
+            pdf_bytes = render()
+        pdf_cache.put(fingerprint, pdf_bytes, size=len(pdf_bytes))
+        return pdf_bytes
+    finally:
+        with _lock:
+            _pending.pop(fingerprint, None)
+
+def render_cached(fingerprint, render, wait=PDF_WAIT_SECONDS):
+    """PDF (bytes) do cache ou renderizado em segundo plano; None se ainda estiver em preparação"""
+    pdf_bytes = pdf_cache.get(fingerprint)
+    if pdf_bytes is not None:
+        return pdf_bytes
+    
+    # Cliques repetidos no mesmo relatório aguardam a mesma renderização
+    with _lock:
+        executor = _get_executor()
+        future = _pending.get(fingerprint)
+        if future is None:
+            future = executor.submit(_render_and_cache, fingerprint, render)
+            _pending[fingerprint] = future
+    
+    try:
+        return future.result(timeout=wait)
+    except FutureTimeoutError:
+        logger.info("⏳ PDF %s ainda em renderização", fingerprint[:8])
+        return None
+
+def long_tables(header, rows, footer, build_style, col_widths=None, chunk_rows=PDF_CHUNK_ROWS):
+    """LongTables de até chunk_rows linhas com cabeçalho repetido; o rodapé vai no último bloco"""
+    from reportlab.platypus import LongTable, TableStyle
+    
+    chunks = [rows[start:start + chunk_rows] for start in range(0, len(rows), chunk_rows)] or [[]]
+    
+    # build_style(total_linhas, com_rodape) devolve os comandos de TableStyle do bloco
+    tables = []
+    for position, chunk in enumerate(chunks):
+        with_footer = footer is not None and position == len(chunks) - 1
+        data = [header] + chunk + ([footer] if with_footer else [])
+        
+        table = LongTable(data, colWidths=col_widths, repeatRows=1)
+        table.setStyle(TableStyle(build_style(len(data), with_footer)))
+        tables.append(table)
+    return tables
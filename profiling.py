@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Profiling de Requisições - Sócrates Online
+Profiling sob demanda (cProfile ou amostragem, protegido por token) e amostragem contínua das requisições lentas
+"""
+
+import cProfile
+import hmac
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from logging_config import get_logger
+
+logger = get_logger('profiling')
+
+# Token de administrador: sem ele o profiling sob demanda fica desligado
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join('uploads', 'profiles'))
+PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', 50))
+
+# Modo contínuo: 1 em cada N requisições das rotas pesadas roda sob o amostrador (0 desliga);
+# o perfil só é guardado se a requisição passar de PROFILE_SLOW_SECONDS
+PROFILE_SAMPLE_EVERY = int(os.environ.get('PROFILE_SAMPLE_EVERY', 100))
+PROFILE_SLOW_SECONDS = float(os.environ.get('PROFILE_SLOW_SECONDS', 2.0))
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.005))
+
+# Rotas pesadas amostradas no modo contínuo (template da URL)
+SAMPLED_ROUTES = ('/upload', '/generate_report', '/export/<export_type>')
+
+# Cabeçalhos / parâmetros do modo sob demanda
+PROFILE_HEADER = 'X-Profile'
+TOKEN_HEADER = 'X-Admin-Token'
+PROFILE_MODES = ('cprofile', 'sampling')
+
+# Nomes de artefato aceitos no download (evita caminhos arbitrários)
+ARTIFACT_PATTERN = re.compile(r'^[\w.-]+\.(prof|folded)$')
+
+_sample_counter = itertools.count(1)
+_artifact_ids = itertools.count(1)
+
+class StackSampler:
+    """Amostrador de pilha de uma thread: baixo custo, saída no formato 'collapsed' (flamegraph/speedscope)"""
+
+    def __init__(self, thread_id, interval=PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, 'w') as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f"{stack} {count}\n")
+
+def is_admin(request):
+    """Token de administrador no cabeçalho ou na query string"""
+    token = request.headers.get(TOKEN_HEADER) or request.args.get('token', '')
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+def requested_mode(request):
+    """Modo pedido pelo cliente (cabeçalho X-Profile ou ?profile=), só para administradores"""
+    mode = request.headers.get(PROFILE_HEADER) or request.args.get('profile')
+    if mode not in PROFILE_MODES or not is_admin(request):
+        return None
+    return mode
+
+def _artifact_path(route, extension):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = re.sub(r'[^\w]+', '_', route).strip('_') or 'raiz'
+    return os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{next(_artifact_ids)}_{name}.{extension}")
+
+def _prune():
+    """Manter só os PROFILE_MAX_FILES artefatos mais recentes"""
+    try:
+        paths = [os.path.join(PROFILE_DIR, name) for name in os.listdir(PROFILE_DIR) if ARTIFACT_PATTERN.match(name)]
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:-PROFILE_MAX_FILES]:
+            os.remove(path)
+    except OSError:
+        pass
+
+def list_artifacts():
+    """Artefatos disponíveis, do mais recente para o mais antigo"""
+    try:
+        names = [name for name in os.listdir(PROFILE_DIR) if ARTIFACT_PATTERN.match(name)]
+    except OSError:
+        return []
+
+    artifacts = []
+    for name in names:
+        try:
+            stat = os.stat(os.path.join(PROFILE_DIR, name))
+        except OSError:
+            continue
+        artifacts.append({'name': name, 'bytes': stat.st_size, 'modified': stat.st_mtime})
+    artifacts.sort(key=lambda item: item['modified'], reverse=True)
+    return artifacts
+
+def artifact_path(name):
+    """Caminho de um artefato pelo nome (None se inválido ou inexistente)"""
+    if not ARTIFACT_PATTERN.match(name):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+def init_profiling(app):
+    """Profiling sob demanda (administrador) e amostragem contínua das requisições lentas"""
+    from flask import g, request
+
+    @app.before_request
+    def start_profiler():
+        mode = requested_mode(request)
+        sampled = False
+
+        if mode is None and PROFILE_SAMPLE_EVERY > 0 and request.url_rule is not None \
+                and request.url_rule.rule in SAMPLED_ROUTES:
+            sampled = next(_sample_counter) % PROFILE_SAMPLE_EVERY == 0
+            if sampled:
+                mode = 'sampling'
+
+        if mode is None:
+            return None
+
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Outro cProfile já ativo neste processo (requisição concorrente)
+                logger.info("🔬 cProfile ocupado - requisição sem perfil")
+                return None
+        else:
+            profiler = StackSampler(threading.get_ident()).start()
+        g.profile = (mode, profiler, sampled, time.perf_counter())
+        return None
+
+    def stop_profiler():
+        mode, profiler, sampled, start = g.pop('profile')
+        if mode == 'cprofile':
+            profiler.disable()
+        else:
+            profiler.stop()
+        return mode, profiler, sampled, time.perf_counter() - start
+
+    @app.after_request
+    def save_profile(response):
+        if 'profile' not in g:
+            return response
+
+        mode, profiler, sampled, elapsed = stop_profiler()
+
+        # Amostragem contínua: só as requisições lentas viram artefato
+        if sampled and elapsed < PROFILE_SLOW_SECONDS:
+            return response
+
+        route = request.url_rule.rule if request.url_rule is not None else request.path
+        try:
+            if mode == 'cprofile':
+                path = _artifact_path(route, 'prof')
+                profiler.dump_stats(path)
+            else:
+                path = _artifact_path(route, 'folded')
+                profiler.dump(path)
+            _prune()
+        except OSError as e:
+            logger.warning("⚠️ Erro ao gravar perfil: %s", e)
+            return response
+
+        name = os.path.basename(path)
+        response.headers['X-Profile-Id'] = name
+        logger.info(
+            "🔬 Perfil %s gravado (%s, %.2f s)", name, 'amostragem contínua' if sampled else mode, elapsed,
+            extra={'route': route, 'profile': name, 'elapsed': round(elapsed, 4)}
+        )
+        return response
+
+    @app.teardown_request
+    def discard_profile(exc):
+        # Exceção não tratada: after_request não rodou, o profiler ainda está ativo
+        if 'profile' in g:
+            stop_profiler()
+
+    return save_profile
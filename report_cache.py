@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Cache de Relatórios - Sócrates Online
+Cache LRU limitado por quantidade de entradas e por bytes, com contadores de acerto
+"""
+
+import itertools
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+# Limites padrão (podem ser ajustados por variável de ambiente)
+REPORT_CACHE_MAX_ENTRIES = int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', 256))
+REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+# Versões de dataset únicas no processo: cada importação recebe uma nova
+_data_versions = itertools.count(1)
+
+def new_data_version():
+    """Nova versão de dataset (invalida relatórios em cache da versão anterior)"""
+    return next(_data_versions)
+
+def make_report_key(data_version, cadastros_version, tipo_filtro, selection, data_inicio, data_fim):
+    """Chave do relatório: versões + filtro + seleção ordenada + período"""
+    return (
+        data_version,
+        cadastros_version,
+        tipo_filtro,
+        tuple(sorted(set(selection))),
+        data_inicio,
+        data_fim
+    )
+
+def estimate_size(value):
+    """Estimativa do tamanho em bytes de listas/dicts de valores simples"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += estimate_size(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+class ReportCache:
+    """Cache LRU thread-safe de resultados de relatório"""
+    
+    def __init__(self, max_entries=REPORT_CACHE_MAX_ENTRIES, max_bytes=REPORT_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # chave -> (valor, tamanho)
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        """Obter valor (None se ausente), marcando-o como usado recentemente"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key, value, size=None):
+        """Armazenar valor e despejar os menos usados até caber nos limites"""
+        if size is None:
+            size = estimate_size(value)
+        
+        # Valor maior que o cache inteiro: não armazenar
+        if size > self.max_bytes:
+            return False
+        
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            
+            while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+        return True
+    
+    def clear(self):
+        """Remover todas as entradas (mantém os contadores)"""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+    
+    def stats(self):
+        """Contadores de uso do cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
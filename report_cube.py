@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Cubo de Relatórios - Sócrates Online
+Agregação (circo × cidade × mês) calculada uma vez; fatias e consolidações saem do cubo
+"""
+
+import numpy as np
+import pandas as pd
+
+from report_index import AMOUNT_COLUMNS
+
+# Dimensões aceitas pela API -> coluna do cubo
+DIMENSIONS = {'circo': 'Circo', 'cidade': 'Cidade', 'mes': 'Mês'}
+
+class ReportCube:
+    """Células (circo, cidade, mês) com a soma dos quatro valores"""
+    
+    def __init__(self, events):
+        """events: DataFrame de eventos (índice de datas) já com a coluna 'Cidade'"""
+        frame = events[['Circo', 'Cidade'] + AMOUNT_COLUMNS].reset_index(drop=True)
+        frame['Mês'] = np.datetime_as_string(events.index.values.astype('datetime64[M]'), unit='M')
+        
+        # Uma única passada de groupby sobre os eventos
+        self.cells = (
+            frame.groupby(['Circo', 'Cidade', 'Mês'], observed=True, sort=True)[AMOUNT_COLUMNS]
+            .sum()
+            .reset_index()
+        )
+        self.cells['Circo'] = self.cells['Circo'].astype(str)
+        self.cells['Cidade'] = self.cells['Cidade'].astype(str)
+    
+    def __len__(self):
+        return len(self.cells)
+    
+    def slice(self, circos=None, cidades=None, mes_inicio=None, mes_fim=None):
+        """Células filtradas por circos, cidades e intervalo de meses ('AAAA-MM')"""
+        cells = self.cells
+        mask = np.ones(len(cells), dtype=bool)
+        if circos:
+            mask &= cells['Circo'].isin(circos).to_numpy()
+        if cidades:
+            mask &= cells['Cidade'].isin(cidades).to_numpy()
+        if mes_inicio:
+            mask &= (cells['Mês'] >= mes_inicio).to_numpy()
+        if mes_fim:
+            mask &= (cells['Mês'] <= mes_fim).to_numpy()
+        return cells[mask]
+    
+    def rollup(self, dimensions, **filters):
+        """Linhas agregadas pelas dimensões pedidas (lista vazia = total geral)"""
+        columns = [DIMENSIONS[dimension] for dimension in dimensions]
+        cells = self.slice(**filters)
+        
+        if columns:
+            grouped = cells.groupby(columns, sort=True)[AMOUNT_COLUMNS].sum().reset_index()
+        else:
+            grouped = pd.DataFrame([cells[AMOUNT_COLUMNS].sum()])
+        
+        rows = []
+        for record in grouped.to_dict('records'):
+            rows.append({
+                key: float(value) if key in AMOUNT_COLUMNS else value
+                for key, value in record.items()
+            })
+        return rows
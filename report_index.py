@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Índice de Relatórios - Sócrates Online
+Somas acumuladas por circo/cidade para consultas de período em O(log n)
+"""
+
+import numpy as np
+import pandas as pd
+
+from columns import AMOUNT_COLUMNS
+
+CIDADE_NAO_ENCONTRADA = 'Não encontrada'
+
+# Ordinal de 1970-01-01 (origem do datetime64 do NumPy)
+_EPOCH_ORDINAL = 719163
+
+def build_events_frame(processed_data):
+    """DataFrame tipado dos eventos, montado uma vez por importação
+    
+    Índice DatetimeIndex ordenado ('Data Evento'), circo categórico e valores float64.
+    Registros sem data válida (dd/mm/aaaa) ficam de fora, como no filtro por período.
+    """
+    frame = pd.DataFrame.from_records(processed_data, columns=['Circo', 'Data Evento'] + AMOUNT_COLUMNS)
+    dates = pd.to_datetime(frame['Data Evento'], format='%d/%m/%Y', errors='coerce')
+    
+    frame = frame.drop(columns='Data Evento')
+    frame.index = pd.DatetimeIndex(dates, name='Data Evento')
+    frame = frame[frame.index.notna()]
+    
+    frame['Circo'] = frame['Circo'].astype('category')
+    frame[AMOUNT_COLUMNS] = frame[AMOUNT_COLUMNS].astype('float64')
+    return frame.sort_index(kind='stable')
+
+def frame_to_arrays(frame):
+    """Arrays (circos, datas ordinais, valores) a partir do DataFrame de eventos"""
+    days = frame.index.values.astype('datetime64[D]').astype(np.int64)
+    return (
+        frame['Circo'].to_numpy(dtype=object),
+        days + _EPOCH_ORDINAL,
+        frame[AMOUNT_COLUMNS].to_numpy(dtype=np.float64)
+    )
+
+def _group_by_key(keys, dates):
+    """Ordenar por (chave, data) e devolver {chave: (início, fim)} sobre essa ordem"""
+    if len(keys) == 0:
+        return np.array([], dtype=np.int64), {}
+    
+    uniques, codes = np.unique(keys, return_inverse=True)
+    order = np.lexsort((dates, codes))
+    sorted_codes = codes[order]
+    
+    bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(sorted_codes)]))
+    
+    groups = {uniques[sorted_codes[start]]: (start, end) for start, end in zip(starts, ends)}
+    return order, groups
+
+class PrefixSumIndex:
+    """Somas acumuladas dos quatro valores por chave, sobre as datas ordenadas
+    
+    A soma de um período é cum[hi] - cum[lo], com lo/hi obtidos por busca binária.
+    """
+    
+    def __init__(self, keys, dates, amounts):
+        self._entries = {}
+        order, groups = _group_by_key(keys, dates)
+        sorted_dates = dates[order]
+        sorted_amounts = amounts[order]
+        
+        for key, (start, end) in groups.items():
+            cumulative = np.zeros((end - start + 1, amounts.shape[1]))
+            np.cumsum(sorted_amounts[start:end], axis=0, out=cumulative[1:])
+            self._entries[key] = (sorted_dates[start:end], cumulative)
+    
+    def keys(self):
+        return sorted(self._entries)
+    
+    def range_sum(self, key, data_inicio, data_fim):
+        """Somas dos valores da chave entre as datas (inclusive); None se não há eventos"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        dates, cumulative = entry
+        lo = np.searchsorted(dates, data_inicio.toordinal(), side='left')
+        hi = np.searchsorted(dates, data_fim.toordinal(), side='right')
+        if hi == lo:
+            return None
+        return cumulative[hi] - cumulative[lo]
+    
+    def range_report(self, selected_keys, data_inicio, data_fim):
+        """[(chave, somas)] das chaves selecionadas com eventos no período, em ordem alfabética"""
+        result = []
+        for key in sorted(set(selected_keys)):
+            sums = self.range_sum(key, data_inicio, data_fim)
+            if sums is not None:
+                result.append((key, sums))
+        return result
+
+class ScheduleIndex:
+    """Cadastros de circo/cidade agrupados por circo, para associar eventos a cidades
+    
+    Mantém a ordem dos cadastros: vale o primeiro período que contém a data.
+    """
+    
+    def __init__(self, records):
+        self._by_circo = {}
+        for record in records:
+            self._by_circo.setdefault(record.circo, []).append(record)
+    
+    def cidade_de(self, circo, data_evento):
+        """Cidade onde o circo estava na data (None se não cadastrada)"""
+        for record in self._by_circo.get(circo, ()):
+            if record.contem(data_evento):
+                return record.cidade
+        return None
+    
+    def associate(self, circos, dates):
+        """Cidade de cada evento (arrays de circos e datas ordinais)"""
+        cidades = np.full(len(circos), CIDADE_NAO_ENCONTRADA, dtype=object)
+        assigned = np.zeros(len(circos), dtype=bool)
+        order, groups = _group_by_key(circos, dates)
+        sorted_dates = dates[order]
+        
+        for circo, records in self._by_circo.items():
+            if circo not in groups:
+                continue
+            start, end = groups[circo]
+            group_dates = sorted_dates[start:end]
+            
+            for record in records:
+                lo = start + np.searchsorted(group_dates, record.data_inicio.toordinal(), side='left')
+                hi = start + np.searchsorted(group_dates, record.data_fim.toordinal(), side='right')
+                if lo == hi:
+                    continue
+                positions = order[lo:hi]
+                positions = positions[~assigned[positions]]
+                cidades[positions] = record.cidade
+                assigned[positions] = True
+        
+        return cidades
+
+def build_report_rows(sums_by_key, data_inicio, data_fim):
+    """Linhas do relatório no formato usado pela interface e pelas exportações"""
+    periodo_str = f"{data_inicio.strftime('%d/%m/%Y')} - {data_fim.strftime('%d/%m/%Y')}"
+    report_data = []
+    
+    for key, sums in sums_by_key:
+        faturamento_total, faturamento_gestao, taxas, valor_liquido = (float(value) for value in sums)
+        report_data.append({
+            'Circo': key,
+            'Período': periodo_str,
+            'Faturamento Total': faturamento_total,
+            'Faturamento Gestão Produtor': faturamento_gestao,
+            'Taxas e Descontos': taxas,
+            'Valor Líquido': valor_liquido,
+            'Total Geral': faturamento_total
+        })
+    
+    return report_data
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Datasets por Sessão - Sócrates Online
+Um processador por sessão/dataset, com orçamento total de memória e despejo LRU dos ociosos
+"""
+
+import os
+import re
+import secrets
+import threading
+import uuid
+from collections import OrderedDict
+
+from logging_config import get_logger
+
+logger = get_logger('session_store')
+
+# Limites padrão (podem ser ajustados por variável de ambiente)
+SESSION_STORE_MAX_BYTES = int(os.environ.get('SESSION_STORE_MAX_BYTES', 512 * 1024 * 1024))
+SESSION_STORE_MAX_DATASETS = int(os.environ.get('SESSION_STORE_MAX_DATASETS', 64))
+
+# Chave do identificador do dataset no cookie de sessão do Flask
+SESSION_KEY = 'dataset_id'
+
+# Formato de new_dataset_id (o identificador vira nome de diretório dos snapshots)
+DATASET_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# Chave gerada quando SECRET_KEY não está definida (compartilhada pelos workers do container)
+SECRET_KEY_FILE = os.environ.get('SECRET_KEY_FILE', os.path.join('uploads', '.secret_key'))
+
+def new_dataset_id():
+    """Identificador aleatório de dataset"""
+    return uuid.uuid4().hex
+
+def is_valid_dataset_id(dataset_id):
+    """Identificador no formato gerado por new_dataset_id"""
+    return isinstance(dataset_id, str) and DATASET_ID_PATTERN.match(dataset_id) is not None
+
+def load_secret_key():
+    """SECRET_KEY do ambiente; sem ela, uma chave aleatória gravada uma única vez em SECRET_KEY_FILE"""
+    key = os.environ.get('SECRET_KEY')
+    if key:
+        return key
+    
+    os.makedirs(os.path.dirname(SECRET_KEY_FILE) or '.', exist_ok=True)
+    if not os.path.exists(SECRET_KEY_FILE):
+        # os.link não sobrescreve: se dois workers gerarem juntos, vale a chave do primeiro
+        tmp_path = f"{SECRET_KEY_FILE}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as key_file:
+                key_file.write(secrets.token_hex(32))
+            os.link(tmp_path, SECRET_KEY_FILE)
+            logger.warning("⚠️ SECRET_KEY não definida - chave aleatória gerada em %s", SECRET_KEY_FILE)
+        except FileExistsError:
+            pass
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    with open(SECRET_KEY_FILE) as key_file:
+        return key_file.read().strip()
+
+class DatasetStore:
+    """Datasets isolados por identificador, em LRU thread-safe limitado por bytes e quantidade"""
+    
+    def __init__(self, factory, max_bytes=SESSION_STORE_MAX_BYTES, max_datasets=SESSION_STORE_MAX_DATASETS):
+        self._factory = factory
+        self.max_bytes = max_bytes
+        self.max_datasets = max_datasets
+        self._datasets = OrderedDict()  # id -> [dataset, tamanho]
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.evictions = 0
+    
+    def get(self, dataset_id):
+        """Dataset existente (None se ausente ou despejado), marcado como usado recentemente"""
+        with self._lock:
+            entry = self._datasets.get(dataset_id)
+            if entry is None:
+                return None
+            self._datasets.move_to_end(dataset_id)
+            return entry[0]
+    
+    def get_or_create(self, dataset_id):
+        """Dataset da sessão, criando um vazio na primeira vez"""
+        with self._lock:
+            entry = self._datasets.get(dataset_id)
+            if entry is None:
+                entry = [self._factory(), 0]
+                self._datasets[dataset_id] = entry
+                self._evict(keep=dataset_id)
+            else:
+                self._datasets.move_to_end(dataset_id)
+            return entry[0]
+    
+    def update_size(self, dataset_id):
+        """Recalcular o tamanho do dataset (após importação) e despejar ociosos até caber no orçamento"""
+        dataset = self.get(dataset_id)
+        if dataset is None:
+            return False
+        
+        # Medição fora do lock: percorre os DataFrames do dataset
+        size = dataset.memory_usage()
+        
+        with self._lock:
+            entry = self._datasets.get(dataset_id)
+            if entry is None or entry[0] is not dataset:
+                return False
+            
+            self.total_bytes += size - entry[1]
+            entry[1] = size
+            self._datasets.move_to_end(dataset_id)
+            self._evict(keep=dataset_id)
+            return True
+    
+    def discard(self, dataset_id):
+        """Remover dataset"""
+        with self._lock:
+            entry = self._datasets.pop(dataset_id, None)
+            if entry is not None:
+                self.total_bytes -= entry[1]
+    
+    def _evict(self, keep):
+        """Despejar os menos usados (nunca o dataset da requisição atual)"""
+        while len(self._datasets) > 1 and (
+            self.total_bytes > self.max_bytes or len(self._datasets) > self.max_datasets
+        ):
+            oldest = next(iter(self._datasets))
+            if oldest == keep:
+                break
+            _, (_, size) = self._datasets.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            logger.info("🧹 Dataset %s despejado (%.1f MB)", oldest[:8], size / 1024 / 1024)
+    
+    def stats(self):
+        """Contadores do armazenamento de datasets"""
+        with self._lock:
+            return {
+                'datasets': len(self._datasets),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'max_datasets': self.max_datasets,
+                'evictions': self.evictions
+            }
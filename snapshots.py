@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Snapshots de Datasets - Sócrates Online
+Dataset processado gravado em Arrow IPC com ponteiro de versão atômico, mapeado em memória por todos os workers
+"""
+
+import os
+import shutil
+import time
+
+from columns import AMOUNT_COLUMNS
+from logging_config import get_logger
+from session_store import is_valid_dataset_id
+
+logger = get_logger('snapshots')
+
+# Diretório compartilhado pelos workers do mesmo container
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', os.path.join('uploads', 'snapshots'))
+
+POINTER_FILE = 'CURRENT'
+
+# Snapshots sem nova importação há mais que isso são removidos (sessões expiradas ou despejadas).
+# Não há remoção no despejo do DatasetStore: o snapshot é justamente o que restaura o dataset
+# despejado de um worker ou ausente nos demais
+SNAPSHOT_TTL_SECONDS = int(os.environ.get('SNAPSHOT_TTL_SECONDS', 24 * 3600))
+
+# Colunas dos registros processados (processed_data) guardadas no snapshot
+RECORD_COLUMNS = ['Circo', 'Data Evento', 'Evento Completo'] + AMOUNT_COLUMNS
+
+# Coluna auxiliar com a data já convertida (nula quando 'Data Evento' não é dd/mm/aaaa)
+DATE_COLUMN = '_data'
+
+def _dataset_dir(dataset_id):
+    """Diretório dos snapshots de um dataset (o identificador vem do cookie: validado antes do join)"""
+    if not is_valid_dataset_id(dataset_id):
+        raise ValueError(f"Identificador de dataset inválido: {dataset_id!r}")
+    return os.path.join(SNAPSHOT_DIR, dataset_id)
+
+def _replace_atomically(path, write):
+    """Grava em arquivo temporário e troca pelo definitivo com os.replace (atômico no mesmo disco)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def write_snapshot(dataset_id, processed_data):
+    """Grava o dataset processado e aponta CURRENT para ele; devolve a versão"""
+    import pandas as pd
+    import pyarrow as pa
+
+    frame = pd.DataFrame.from_records(processed_data, columns=RECORD_COLUMNS)
+    frame[DATE_COLUMN] = pd.to_datetime(frame['Data Evento'], format='%d/%m/%Y', errors='coerce')
+    frame[AMOUNT_COLUMNS] = frame[AMOUNT_COLUMNS].astype('float64')
+    frame['Circo'] = frame['Circo'].astype('category')
+
+    # Ordem do DataFrame de eventos (por data, sem data por último): os workers usam as colunas sem reordenar
+    frame = frame.sort_values(DATE_COLUMN, kind='stable', na_position='last')
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+
+    directory = _dataset_dir(dataset_id)
+    os.makedirs(directory, exist_ok=True)
+
+    version = f"{time.time_ns()}-{os.getpid()}"
+    snapshot_path = os.path.join(directory, f"{version}.arrow")
+
+    def write_table(path):
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    def write_pointer(path):
+        with open(path, 'w') as pointer:
+            pointer.write(version)
+
+    _replace_atomically(snapshot_path, write_table)
+    _replace_atomically(os.path.join(directory, POINTER_FILE), write_pointer)
+
+    # Versões antigas: quem ainda as mapeia continua lendo (o arquivo só some quando o map fecha)
+    for name in os.listdir(directory):
+        if name.endswith('.arrow') and name != f"{version}.arrow":
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+    logger.info("📸 Snapshot %s gravado: %d registros", version, len(frame))
+    prune_expired(keep=dataset_id)
+    return version
+
+def prune_expired(ttl=SNAPSHOT_TTL_SECONDS, keep=None):
+    """Remover os snapshots de datasets sem importação há mais de `ttl` segundos; devolve quantos"""
+    try:
+        names = os.listdir(SNAPSHOT_DIR)
+    except OSError:
+        return 0
+
+    now = time.time()
+    removed = 0
+    for name in names:
+        if name == keep or not is_valid_dataset_id(name):
+            continue
+        directory = os.path.join(SNAPSHOT_DIR, name)
+        try:
+            # CURRENT é regravado a cada importação; sem ele, vale o diretório
+            pointer = os.path.join(directory, POINTER_FILE)
+            modified = os.path.getmtime(pointer if os.path.exists(pointer) else directory)
+        except OSError:
+            continue
+        if now - modified > ttl:
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+
+    if removed:
+        logger.info("🧹 %d snapshots expirados removidos", removed)
+    return removed
+
+def current_version(dataset_id):
+    """Versão apontada por CURRENT (None se o dataset não tem snapshot)"""
+    try:
+        with open(os.path.join(_dataset_dir(dataset_id), POINTER_FILE)) as pointer:
+            return pointer.read().strip() or None
+    except (OSError, ValueError):
+        return None
+
+def open_snapshot(dataset_id, version):
+    """Tabela Arrow do snapshot, mapeada em memória (sem cópia)"""
+    import pyarrow as pa
+
+    source = pa.memory_map(os.path.join(_dataset_dir(dataset_id), f"{version}.arrow"), 'r')
+    return pa.ipc.open_file(source).read_all()
+
+def snapshot_events_frame(table):
+    """DataFrame de eventos sobre as colunas mapeadas (mesmo formato de build_events_frame)"""
+    import pandas as pd
+
+    valid = table.num_rows - table.column(DATE_COLUMN).null_count
+    events = table.select(['Circo', DATE_COLUMN] + AMOUNT_COLUMNS).slice(0, valid)
+
+    # split_blocks mantém cada coluna numérica apontando para o buffer mapeado
+    frame = events.to_pandas(split_blocks=True)
+    frame.index = pd.DatetimeIndex(frame.pop(DATE_COLUMN), name='Data Evento')
+    return frame
+
+def snapshot_records(table):
+    """Registros (processed_data) materializados a partir do snapshot"""
+    return table.select(RECORD_COLUMNS).to_pylist()
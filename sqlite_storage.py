@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Armazenamento SQLite - Sócrates Online
+Cadastros de circos e cidades em SQLite embutido (modo WAL) para instalações de um único nó e testes
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+from database import CircoCidade, StorageBackend, read_csv_records
+from logging_config import get_logger
+from metrics import DB_QUERY_LATENCY
+
+logger = get_logger('sqlite')
+
+SQLITE_PATH = os.environ.get('SQLITE_PATH', 'socrates.db')
+# Espera (s) por um lock de escrita de outro processo antes de desistir
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 5.0))
+
+# Mesmo formato de database.MIGRATIONS: nunca alterar uma migração publicada, apenas acrescentar
+SQLITE_MIGRATIONS = [
+    (1, 'Tabelas de circos/cidades, circos importados e revisão dos cadastros', [
+        """
+        CREATE TABLE IF NOT EXISTS circos_cidades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cidade TEXT NOT NULL,
+            circo TEXT NOT NULL,
+            data_inicio TEXT NOT NULL,
+            data_fim TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS circos_importados (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            circo TEXT UNIQUE NOT NULL,
+            imported_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Datas em ISO (aaaa-mm-dd): a comparação de texto segue a ordem das datas
+        "CREATE INDEX IF NOT EXISTS idx_circos_cidades_circo_periodo ON circos_cidades(circo, data_inicio, data_fim)",
+        "CREATE INDEX IF NOT EXISTS idx_circos_cidades_periodo ON circos_cidades(data_inicio, data_fim)",
+        "CREATE INDEX IF NOT EXISTS idx_circos_cidades_cidade_circo ON circos_cidades(cidade, circo)",
+        # updated_at tem resolução de segundos: a versão dos cadastros vem de um contador
+        """
+        CREATE TABLE IF NOT EXISTS cadastros_revisao (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            revisao INTEGER NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO cadastros_revisao (id, revisao) VALUES (1, 0)",
+        """
+        CREATE TRIGGER IF NOT EXISTS circos_cidades_revisao_inserir AFTER INSERT ON circos_cidades
+        BEGIN UPDATE cadastros_revisao SET revisao = revisao + 1 WHERE id = 1; END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS circos_cidades_revisao_atualizar AFTER UPDATE ON circos_cidades
+        BEGIN UPDATE cadastros_revisao SET revisao = revisao + 1 WHERE id = 1; END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS circos_cidades_revisao_remover AFTER DELETE ON circos_cidades
+        BEGIN UPDATE cadastros_revisao SET revisao = revisao + 1 WHERE id = 1; END
+        """,
+    ]),
+]
+
+# Mesmos nomes de database.PREPARED_STATEMENTS (métricas comparáveis entre os armazenamentos);
+# o sqlite3 mantém os comandos compilados em cache por conexão
+STATEMENTS = {
+    'circos_cidades_todos': """
+        SELECT id, cidade, circo, data_inicio, data_fim
+        FROM circos_cidades
+        ORDER BY cidade, circo, id
+    """,
+    'circos_cidades_periodo_por_circos': """
+        SELECT id, cidade, circo, data_inicio, data_fim
+        FROM circos_cidades
+        WHERE circo IN ({circos}) AND data_inicio <= ? AND data_fim >= ?
+        ORDER BY cidade, circo, id
+    """,
+    'circos_cidades_periodo': """
+        SELECT id, cidade, circo, data_inicio, data_fim
+        FROM circos_cidades
+        WHERE data_inicio <= ? AND data_fim >= ?
+        ORDER BY cidade, circo, id
+    """,
+    'circos_cidades_inserir': """
+        INSERT INTO circos_cidades (cidade, circo, data_inicio, data_fim)
+        VALUES (?, ?, ?, ?)
+    """,
+    'circos_cidades_atualizar': """
+        UPDATE circos_cidades
+        SET cidade = ?, circo = ?, data_inicio = ?, data_fim = ?,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """,
+    'circos_cidades_remover': """
+        DELETE FROM circos_cidades WHERE id = ?
+    """,
+    'circos_cidades_contar': """
+        SELECT COUNT(*) FROM circos_cidades
+    """,
+    'circos_cidades_versao': """
+        SELECT revisao FROM cadastros_revisao WHERE id = 1
+    """,
+    'circos_importados_todos': """
+        SELECT circo FROM circos_importados ORDER BY circo
+    """,
+    'circos_importados_limpar': """
+        DELETE FROM circos_importados
+    """,
+    'circos_importados_inserir': """
+        INSERT OR IGNORE INTO circos_importados (circo) VALUES (?)
+    """,
+}
+
+def _iso_date(value):
+    """Data do formulário (dd/mm/aaaa) no formato gravado (aaaa-mm-dd)"""
+    return datetime.strptime(value, '%d/%m/%Y').date().isoformat()
+
+def _to_record(row):
+    return CircoCidade(row[0], row[1], row[2], date.fromisoformat(row[3]), date.fromisoformat(row[4]))
+
+# Conexões herdadas do processo pai: mantidas referenciadas (e nunca usadas) no filho
+_inherited_connections = []
+
+class SQLiteManager(StorageBackend):
+    """Cadastros em um arquivo SQLite local
+
+    Uma conexão por thread (reaproveitada por threads novas com o mesmo identificador),
+    aberta sob demanda e descartada após fork. Leituras não bloqueiam a escrita no modo WAL.
+    O schema é aplicado na primeira conexão do processo.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path=None):
+        super().__init__()
+        self.path = path or SQLITE_PATH
+        self._connections = {}  # identificador da thread -> conexão
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._migration_lock = threading.Lock()
+        self._migrated = False
+
+    @property
+    def connection(self):
+        """Conexão da thread atual (conecta na primeira chamada)"""
+        if self._pid != os.getpid():
+            self.reset_after_fork()
+        connection = self._connections.get(threading.get_ident())
+        if connection is None:
+            connection = self.connect()
+        return connection
+
+    def connect(self):
+        """Abrir a conexão desta thread (modo WAL)"""
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+
+            # check_same_thread=False: close() fecha as conexões de todas as threads
+            connection = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Em WAL, NORMAL não corrompe o banco em queda; só pode perder a última transação
+            connection.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error as e:
+            logger.error("❌ Erro ao abrir SQLite em %s: %s", self.path, e)
+            return None
+
+        with self._lock:
+            # Conexões de threads que já terminaram (servidor com uma thread por requisição)
+            alive = {thread.ident for thread in threading.enumerate()}
+            for ident in [ident for ident in self._connections if ident not in alive]:
+                self._connections.pop(ident).close()
+            self._connections[threading.get_ident()] = connection
+
+        # Demais threads esperam o schema antes da primeira consulta
+        if not self._migrated:
+            with self._migration_lock:
+                if not self._migrated:
+                    logger.info("🗄️ SQLite em %s (WAL)", os.path.abspath(self.path))
+                    self._migrated = self.apply_migrations()
+        return connection
+
+    def _execute(self, connection, name, params=(), circos=None):
+        """Executar um comando de STATEMENTS pelo nome"""
+        sql = STATEMENTS[name]
+        if circos is not None:
+            sql = sql.format(circos=', '.join(['?'] * len(circos)))
+        start = time.perf_counter()
+        try:
+            return connection.execute(sql, params)
+        finally:
+            DB_QUERY_LATENCY.observe(time.perf_counter() - start, name)
+
+    def _drop_connection(self):
+        """Descartar a conexão da thread atual (reabre no próximo uso)"""
+        with self._lock:
+            connection = self._connections.pop(threading.get_ident(), None)
+        if connection is not None:
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
+
+    def reset_after_fork(self):
+        """Descartar conexões herdadas do processo pai sem usá-las"""
+        # Não fechar: o SQLite não deve tocar no processo filho em conexões abertas pelo pai
+        _inherited_connections.extend(self._connections.values())
+        self._connections = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._migration_lock = threading.Lock()
+
+    def close(self):
+        """Fechar as conexões do processo atual"""
+        if self._pid != os.getpid():
+            self.reset_after_fork()
+            return
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections = {}
+        for connection in connections:
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
+
+    def apply_migrations(self):
+        """Aplicar, em ordem, as migrações de schema ainda pendentes"""
+        connection = self.connection
+        if not connection:
+            return False
+
+        try:
+            # BEGIN IMMEDIATE: um processo por vez aplica as migrações
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            applied = {row[0] for row in connection.execute("SELECT version FROM schema_migrations")}
+
+            for version, description, statements in SQLITE_MIGRATIONS:
+                if version in applied:
+                    continue
+
+                logger.info("📦 Aplicando migração SQLite %s: %s", version, description)
+                for statement in statements:
+                    connection.execute(statement)
+                connection.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+                    (version, description)
+                )
+
+            connection.commit()
+            return True
+
+        except sqlite3.Error as e:
+            logger.error("❌ Erro ao aplicar migrações SQLite: %s", e)
+            connection.rollback()
+            return False
+
+    def migrate_csv_data(self, path='circos_cidades.csv'):
+        """Importar o circos_cidades.csv se a tabela estiver vazia"""
+        connection = self.connection
+        if not connection or not os.path.exists(path):
+            return
+
+        try:
+            count = self._execute(connection, 'circos_cidades_contar').fetchone()[0]
+            if count > 0:
+                logger.info("📊 SQLite já tem %d registros", count)
+                return
+
+            logger.info("📦 Migrando dados do CSV para SQLite...")
+            records = read_csv_records(path)
+            connection.executemany(
+                STATEMENTS['circos_cidades_inserir'],
+                [(r.cidade, r.circo, r.data_inicio.isoformat(), r.data_fim.isoformat()) for r in records]
+            )
+            connection.commit()
+            logger.info("✅ %d registros migrados para SQLite", len(records))
+
+        except sqlite3.Error as e:
+            logger.error("❌ Erro na migração: %s", e)
+            connection.rollback()
+
+    def get_all(self):
+        """Obter todos os registros"""
+        connection = self.connection
+        if not connection:
+            return []
+
+        try:
+            return [_to_record(row) for row in self._execute(connection, 'circos_cidades_todos')]
+        except sqlite3.Error as e:
+            logger.error("❌ Erro ao buscar dados SQLite: %s", e)
+            return []
+
+    def get_by_periodo(self, data_inicio, data_fim, circos=None):
+        """Registros cujo período se sobrepõe ao intervalo (opcionalmente só de alguns circos)"""
+        connection = self.connection
+        if not connection:
+            return []
+
+        try:
+            if circos is not None:
+                circos = list(circos)
+                if not circos:
+                    return []
+                cursor = self._execute(
+                    connection, 'circos_cidades_periodo_por_circos',
+                    (*circos, data_fim.isoformat(), data_inicio.isoformat()), circos
+                )
+            else:
+                cursor = self._execute(connection, 'circos_cidades_periodo', (data_fim.isoformat(), data_inicio.isoformat()))
+            return [_to_record(row) for row in cursor]
+
+        except sqlite3.Error as e:
+            logger.error("❌ Erro ao buscar registros por período: %s", e)
+            return []
+
+    def get_version(self):
+        """Versão dos cadastros: muda a cada inserção, alteração ou remoção"""
+        connection = self.connection
+        if not connection:
+            return None
+
+        try:
+            return ('sqlite', self._execute(connection, 'circos_cidades_versao').fetchone()[0])
+        except sqlite3.Error as e:
+            logger.error("❌ Erro ao obter versão dos cadastros: %s", e)
+            return None
+
+    def add_circo(self, cidade, circo, data_inicio, data_fim):
+        """Adicionar novo registro"""
+        connection = self.connection
+        if not connection:
+            return False
+
+        try:
+            self._execute(connection, 'circos_cidades_inserir', (cidade, circo, _iso_date(data_inicio), _iso_date(data_fim)))
+            connection.commit()
+            logger.info("✅ Circo adicionado ao SQLite: %s em %s", circo, cidade)
+            return True
+
+        except Exception as e:
+            logger.exception("❌ Erro ao adicionar circo: %s", e)
+            connection.rollback()
+            return False
+
+    def update_circo(self, index, cidade, circo, data_inicio, data_fim):
+        """Atualizar registro existente"""
+        connection = self.connection
+        record = self._record_at(index) if connection else None
+        if record is None:
+            return False
+
+        try:
+            self._execute(connection, 'circos_cidades_atualizar', (
+                cidade, circo, _iso_date(data_inicio), _iso_date(data_fim), record.id
+            ))
+            connection.commit()
+            logger.info("✅ Circo atualizado no SQLite: %s em %s", circo, cidade)
+            return True
+
+        except Exception as e:
+            logger.error("❌ Erro ao atualizar circo: %s", e)
+            connection.rollback()
+            return False
+
+    def delete_circo(self, index):
+        """Deletar registro"""
+        connection = self.connection
+        record = self._record_at(index) if connection else None
+        if record is None:
+            return False
+
+        try:
+            self._execute(connection, 'circos_cidades_remover', (record.id,))
+            connection.commit()
+            logger.info("✅ Circo removido do SQLite: %s em %s", record.circo, record.cidade)
+            return True
+
+        except sqlite3.Error as e:
+            logger.error("❌ Erro ao deletar circo: %s", e)
+            connection.rollback()
+            return False
+
+    def save_circos_importados(self, circos_list):
+        """Salvar lista de circos importados do Excel"""
+        connection = self.connection
+        if not connection:
+            return False
+
+        try:
+            self._execute(connection, 'circos_importados_limpar')
+            for circo in circos_list:
+                self._execute(connection, 'circos_importados_inserir', (circo,))
+            connection.commit()
+            logger.info("✅ %d circos importados salvos no SQLite", len(circos_list))
+            return True
+
+        except sqlite3.Error as e:
+            logger.error("❌ Erro ao salvar circos importados: %s", e)
+            connection.rollback()
+            return False
+
+    def get_circos_importados(self):
+        """Obter lista de circos importados do Excel"""
+        connection = self.connection
+        if not connection:
+            return []
+
+        try:
+            return [row[0] for row in self._execute(connection, 'circos_importados_todos')]
+        except sqlite3.Error as e:
+            logger.error("❌ Erro ao buscar circos importados: %s", e)
+            return []
+
+    def verify_and_recover(self):
+        """Verificar a conexão da thread atual (reabre se necessário)"""
+        connection = self.connection
+        if connection is None:
+            return False
+        try:
+            connection.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            logger.warning("⚠️ SQLite: Reabrindo conexão...")
+            self._drop_connection()
+            return self.connection is not None
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Utilitários Web - Sócrates Online
+Provedor JSON rápido (orjson, opcional) e compressão gzip/brotli das respostas grandes
+"""
+
+import gzip
+import importlib.util
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+from logging_config import get_logger
+
+logger = get_logger('web_utils')
+
+# orjson e brotli são opcionais: sem eles ficam o json da stdlib e o gzip
+ORJSON_AVAILABLE = importlib.util.find_spec('orjson') is not None
+BROTLI_AVAILABLE = importlib.util.find_spec('brotli') is not None
+
+# Respostas menores que isso não compensam a compressão
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 4))
+
+# Tipos de conteúdo textuais (xlsx, pdf e parquet já são comprimidos)
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/csv', 'text/plain', 'text/css', 'application/javascript'}
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Provedor JSON do Flask sobre orjson (mesmas saídas do padrão: chaves ordenadas, datas via default)"""
+    
+    def dumps(self, obj, **kwargs):
+        import orjson
+        
+        # Datas passam pelo default do Flask para manter o formato atual das respostas
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        import orjson
+        return orjson.loads(s)
+
+def init_json(app):
+    """Usar orjson como provedor JSON quando disponível"""
+    if ORJSON_AVAILABLE:
+        app.json = OrjsonProvider(app)
+    else:
+        logger.warning("⚠️ orjson não disponível - usando json da stdlib")
+
+def _choose_encoding(accept_encoding):
+    """Codificação aceita pelo cliente: brotli quando possível, senão gzip"""
+    accepted = {part.split(';')[0].strip().lower() for part in accept_encoding.split(',')}
+    if BROTLI_AVAILABLE and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+def compress_body(data, encoding):
+    """Comprimir bytes com a codificação escolhida"""
+    if encoding == 'br':
+        import brotli
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+def init_compression(app, min_size=COMPRESS_MIN_BYTES):
+    """Comprimir respostas textuais acima de min_size conforme o Accept-Encoding"""
+    from flask import request
+    
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+        
+        encoding = _choose_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+        
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        
+        response.set_data(compress_body(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+    
+    return compress_response